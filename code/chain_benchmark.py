@@ -0,0 +1,204 @@
+"""
+chain_benchmark.py — How Fast Does the Witness Write?
+
+Times the hash-chain operations as chains grow, from a thousand blocks to
+a million: building and verifying a hashchain chain, appending to and
+verifying a PS-SHA-∞ chain, and loading and summarizing a RoadChain file
+(in memory, and straight from the file's summary).
+
+For every size and operation it records blocks per second and peak
+memory (tracemalloc), saves them as a JSON baseline, and flags any later
+run that is slower or hungrier than the baseline by more than a threshold.
+Everything is synthetic and runs offline.
+
+    python chain_benchmark.py --sizes 1000,10000,100000 --baseline bench.json
+    python chain_benchmark.py --sizes 1000,10000,100000 --baseline bench.json --update
+
+Author: BlackRoad OS, Inc.
+"""
+
+import argparse
+import gc
+import json
+import os
+import platform
+import tempfile
+import time
+import tracemalloc
+
+from godel import PSHashChain
+from hashchain import build_chain, frozen_clock, verify_chain
+from roadchain import chain_file_stats, chain_stats, load_chain, make_block
+
+
+DEFAULT_SIZES = [1_000, 10_000, 100_000, 1_000_000]
+REGRESSION_THRESHOLD = 0.25
+CLOCK = frozen_clock("2009-01-03T18:15:05Z")
+
+
+def synthetic_roadchain(n: int) -> list[dict]:
+    """A RoadChain-shaped chain of n journal blocks."""
+    senders = ['satoshi', 'hal_finney', 'time', 'alexa']
+    chain = []
+    prev_hash = '0' * 64
+    for i in range(n):
+        ts = f"2009-{1 + i % 12:02d}-{1 + i % 28:02d}T{i % 24:02d}:00:00Z"
+        block = make_block(i, prev_hash, ts, senders[i % 4], senders[(i + 1) % 4],
+                           f"journal entry {i}")
+        chain.append(block)
+        prev_hash = block['hash']
+    return chain
+
+
+def _measure(fn, memory: bool) -> tuple[object, float, int]:
+    """Run fn once; return (result, seconds, peak traced bytes or 0)."""
+    gc.collect()
+    if not memory:
+        started = time.perf_counter()
+        result = fn()
+        return result, time.perf_counter() - started, 0
+    tracemalloc.start()
+    try:
+        started = time.perf_counter()
+        result = fn()
+        seconds = time.perf_counter() - started
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, seconds, peak
+
+
+def _cases(n: int, workdir: str) -> list[tuple[str, object]]:
+    """(name, callable) pairs for one chain size, in dependency order."""
+    events = [f"event {i}" for i in range(n)]
+    state = {}
+    path = os.path.join(workdir, f"chain-{n}.json")
+
+    def build():
+        state['chain'] = build_chain(events, clock=CLOCK)
+
+    def ps_append():
+        ps = PSHashChain()
+        for event in events:
+            ps.append(event)
+        state['ps'] = ps
+
+    def load():
+        state['road'] = load_chain(path)
+
+    with open(path, 'w') as f:
+        json.dump(synthetic_roadchain(n), f)
+
+    return [
+        ('build_chain', build),
+        ('verify_chain', lambda: verify_chain(state['chain'])),
+        ('ps_append', ps_append),
+        ('ps_verify', lambda: state['ps'].verify()),
+        ('load_chain', load),
+        ('chain_stats', lambda: chain_stats(state['road'])),
+        ('file_stats', lambda: chain_file_stats(path)),
+    ]
+
+
+def run_benchmarks(sizes: list[int] = DEFAULT_SIZES, memory: bool = True) -> dict:
+    """
+    Time every operation at every size. Each operation is run once for its
+    wall time and, with memory=True, once more under tracemalloc for its
+    peak, so tracing overhead does not distort the throughput numbers.
+    """
+    results = {}
+    with tempfile.TemporaryDirectory() as workdir:
+        for n in sizes:
+            row = {}
+            for name, fn in _cases(n, workdir):
+                _, seconds, _ = _measure(fn, memory=False)
+                peak = _measure(fn, memory=True)[2] if memory else 0
+                row[name] = {
+                    'seconds': seconds,
+                    'blocks_per_s': n / seconds if seconds else float('inf'),
+                    'peak_bytes': peak,
+                }
+            results[str(n)] = row
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'results': results,
+    }
+
+
+def find_regressions(current: dict, baseline: dict,
+                     threshold: float = REGRESSION_THRESHOLD) -> list[dict]:
+    """
+    Operations that lost more than threshold of their throughput, or grew
+    their peak memory by more than threshold, against the baseline.
+    """
+    regressions = []
+    for size, row in current['results'].items():
+        for name, now in row.items():
+            then = baseline.get('results', {}).get(size, {}).get(name)
+            if then is None:
+                continue
+            if now['blocks_per_s'] < then['blocks_per_s'] * (1 - threshold):
+                regressions.append({'size': int(size), 'operation': name, 'metric': 'blocks_per_s',
+                                    'baseline': then['blocks_per_s'], 'current': now['blocks_per_s']})
+            if then['peak_bytes'] and now['peak_bytes'] > then['peak_bytes'] * (1 + threshold):
+                regressions.append({'size': int(size), 'operation': name, 'metric': 'peak_bytes',
+                                    'baseline': then['peak_bytes'], 'current': now['peak_bytes']})
+    return regressions
+
+
+def load_baseline(path: str) -> dict:
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_baseline(results: dict, path: str):
+    with open(path, 'w') as f:
+        json.dump(results, f, indent=2)
+
+
+def print_report(current: dict, regressions: list[dict]):
+    print("=" * 72)
+    print("HASH CHAIN BENCHMARK")
+    print("=" * 72)
+    print(f"\n  Python {current['python']} on {current['machine']}\n")
+    print(f"  {'Blocks':>9}  {'Operation':<14}  {'Blocks/s':>12}  {'Seconds':>9}  {'Peak MiB':>9}")
+    print("  " + "-" * 60)
+    for size, row in current['results'].items():
+        for name, r in row.items():
+            print(f"  {int(size):>9,}  {name:<14}  {r['blocks_per_s']:>12,.0f}  "
+                  f"{r['seconds']:>9.3f}  {r['peak_bytes'] / 2**20:>9.2f}")
+    if regressions:
+        print(f"\n  ❌ {len(regressions)} regression(s):")
+        for r in regressions:
+            print(f"    {r['size']:>9,}  {r['operation']:<14}  {r['metric']}: "
+                  f"{r['baseline']:,.0f} → {r['current']:,.0f}")
+    else:
+        print("\n  ✅ No regressions against the baseline.")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--sizes', default='1000,10000',
+                        help="comma-separated chain sizes (default: 1000,10000)")
+    parser.add_argument('--baseline', help="JSON baseline file to compare against")
+    parser.add_argument('--update', action='store_true', help="write this run as the new baseline")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="allowed relative slowdown or memory growth (default: 0.25)")
+    parser.add_argument('--no-memory', action='store_true', help="skip the tracemalloc pass")
+    args = parser.parse_args(argv)
+
+    current = run_benchmarks([int(n) for n in args.sizes.split(',')], memory=not args.no_memory)
+    baseline = load_baseline(args.baseline) if args.baseline else {}
+    regressions = find_regressions(current, baseline, args.threshold)
+    print_report(current, regressions)
+    if args.baseline and args.update:
+        save_baseline(current, args.baseline)
+        print(f"  Baseline written to {args.baseline}")
+    return 1 if regressions and not args.update else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
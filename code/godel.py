@@ -17,11 +17,12 @@ Unless you use a hash chain.
 Witnessing is not the same as proving.
 """
 
-import hashlib
 import json
 import time
 from typing import Optional
 
+from hashchain import DIGEST_ALGORITHMS, load_watermark, save_watermark
+
 
 # ── Gödel's Construction ──────────────────────────────────────────────────────
 # Gödel encoded mathematical statements as numbers (Gödel numbering).
@@ -108,12 +109,15 @@ class PSHashChain:
     - Forgery is computationally infeasible
     """
     
-    def __init__(self):
+    def __init__(self, algorithm: str = "sha256"):
         self.chain = []
         self.genesis_hash = "0" * 64  # The void before the first state
+        self.algorithm = algorithm
     
     def _hash(self, data: str) -> str:
-        return hashlib.sha256(data.encode()).hexdigest()
+        # The first block records the algorithm; older chains are SHA-256
+        algorithm = self.chain[0].get("algorithm", "sha256") if self.chain else self.algorithm
+        return DIGEST_ALGORITHMS[algorithm](data.encode()).hexdigest()
     
     def append(self, content: str, actor: str = "system") -> dict:
         """Add a witnessed state to the chain."""
@@ -138,10 +142,12 @@ class PSHashChain:
             "content": content,
             "hash": block_hash,
         }
+        if not self.chain:
+            block["algorithm"] = self.algorithm
         self.chain.append(block)
         return block
     
-    def verify(self) -> tuple[bool, Optional[int]]:
+    def verify(self, start: int = 0) -> tuple[bool, Optional[int]]:
         """
         Verify chain integrity.
         Cannot prove the content is true — only that it was witnessed in sequence.
@@ -150,7 +156,8 @@ class PSHashChain:
         if not self.chain:
             return True, None
         
-        for i, block in enumerate(self.chain):
+        for i in range(start, len(self.chain)):
+            block = self.chain[i]
             expected_prev = self.genesis_hash if i == 0 else self.chain[i-1]["hash"]
             if block["prev"] != expected_prev:
                 return False, i
@@ -169,6 +176,25 @@ class PSHashChain:
         
         return True, None
     
+    def verify_incremental(self, watermark_path: str) -> tuple[bool, Optional[int]]:
+        """
+        Verify only what was witnessed since the last successful check.
+        The watermark file holds the index and hash of the last verified
+        block; the new suffix is checked, including its link to that block.
+        """
+        start = 0
+        mark = load_watermark(watermark_path)
+        if mark is not None:
+            if mark["index"] >= len(self.chain) or self.chain[mark["index"]]["hash"] != mark["hash"]:
+                # The already-witnessed past no longer matches
+                return False, min(mark["index"], len(self.chain))
+            start = mark["index"] + 1
+        
+        valid, fail_idx = self.verify(start)
+        if valid and self.chain:
+            save_watermark(watermark_path, len(self.chain) - 1, self.chain[-1]["hash"])
+        return valid, fail_idx
+    
     def __len__(self):
         return len(self.chain)
     
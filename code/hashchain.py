@@ -11,53 +11,1102 @@ See §2 of PAPER.md: "The Hash Chain as Witness"
 Author: BlackRoad OS, Inc.
 """
 
+import binascii
+import functools
 import hashlib
+import struct
 import time
+import itertools
 import json
+import math
+import mmap
+import multiprocessing
+import os
+from collections.abc import Sequence
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
 from datetime import datetime
+from typing import IO, Callable, Iterable, Iterator, Optional, Union
+
+try:
+    import numpy as np
+except ImportError:  # the avalanche engine falls back to pure Python
+    np = None
+
+
+# Every algorithm yields a 32-byte digest, so hashes stay 64 hex characters
+# and chains of any algorithm share one layout. A chain's algorithm is
+# recorded in its genesis block; chains without the tag are SHA-256.
+DIGEST_ALGORITHMS = {
+    'sha256': hashlib.sha256,
+    'blake2b': functools.partial(hashlib.blake2b, digest_size=32),
+    'blake2s': hashlib.blake2s,
+    'sha3_256': hashlib.sha3_256,
+}
 
 
 def sha256(data: str) -> str:
     return hashlib.sha256(data.encode()).hexdigest()
 
 
-def mine_block(index: int, previous_hash: str, data: str) -> dict:
-    """Create a single block in a hash chain."""
-    timestamp = datetime.utcnow().isoformat() + 'Z'
+def digest(data: str, algorithm: str = 'sha256') -> str:
+    """Hex digest of data under any of DIGEST_ALGORITHMS."""
+    return DIGEST_ALGORITHMS[algorithm](data.encode()).hexdigest()
+
+
+def chain_algorithm(genesis: Optional[dict]) -> str:
+    """
+    The digest algorithm a chain was built with, from its genesis block.
+    Raises ValueError if the tag names none of DIGEST_ALGORITHMS; the
+    verifiers report such a chain invalid at index 0.
+    """
+    algorithm = (genesis or {}).get('algorithm', 'sha256')
+    if not isinstance(algorithm, str) or algorithm not in DIGEST_ALGORITHMS:
+        raise ValueError(f"unknown digest algorithm: {algorithm!r}")
+    return algorithm
+
+
+def utc_timestamp() -> str:
+    """The default block clock: the current UTC time, ISO 8601 with 'Z'."""
+    return datetime.utcnow().isoformat() + 'Z'
+
+
+def frozen_clock(timestamp: Optional[str] = None) -> Callable[[], str]:
+    """
+    A clock that always returns the same timestamp. With no argument the
+    real clock is read once, so a whole batch shares one reading; with a
+    fixed string, chains become reproducible.
+    """
+    timestamp = utc_timestamp() if timestamp is None else timestamp
+    return lambda: timestamp
+
+
+def mine_block(index: int, previous_hash: str, data: str,
+               clock: Callable[[], str] = utc_timestamp,
+               difficulty_bits: int = 0, workers: int = 1, algorithm: str = 'sha256') -> dict:
+    """
+    Create a single block in a hash chain.
+    With difficulty_bits > 0 the block also carries a proof-of-work nonce:
+    its hash must fall below 2^(256 - difficulty_bits).
+    """
+    if not 0 <= difficulty_bits <= 255:
+        raise ValueError(f"difficulty_bits must be between 0 and 255, got {difficulty_bits}")
+    timestamp = clock()
     content = f"{index}{previous_hash}{timestamp}{data}"
-    block_hash = sha256(content)
+    if not difficulty_bits:
+        return {
+            'index': index,
+            'timestamp': timestamp,
+            'data': data,
+            'previous_hash': previous_hash,
+            'hash': digest(content, algorithm),
+        }
+    prefix = f"{content}:{difficulty_bits}:".encode()
+    nonce, _, _ = proof_of_work(prefix, difficulty_bits, workers=workers, algorithm=algorithm)
     return {
         'index': index,
         'timestamp': timestamp,
         'data': data,
         'previous_hash': previous_hash,
-        'hash': block_hash,
+        'difficulty_bits': difficulty_bits,
+        'nonce': nonce,
+        'hash': DIGEST_ALGORITHMS[algorithm](prefix + b'%d' % nonce).hexdigest(),
     }
 
 
-def build_chain(events: list[str]) -> list[dict]:
-    """Build a hash chain from a list of events."""
-    # Genesis block — starts at zero, just like Bitcoin's genesis block
-    genesis = mine_block(0, '0' * 64, 'genesis')
-    chain = [genesis]
+def mine_blocks(events: Iterable[str], previous_hash: str = '0' * 64, start: int = 0,
+                clock: Callable[[], str] = utc_timestamp,
+                algorithm: str = 'sha256') -> list[dict]:
+    """
+    Mine a batch of events onto previous_hash, numbering from start.
+    Same blocks as calling mine_block in a loop, without the per-call
+    setup: the output list is sized once and the hash function, encoder
+    and clock are bound locally for the whole batch.
+    """
+    events = events if isinstance(events, list) else list(events)
+    blocks = [None] * len(events)
+    new_hash = DIGEST_ALGORITHMS[algorithm]
+    for offset, data in enumerate(events):
+        index = start + offset
+        timestamp = clock()
+        block_hash = new_hash(f"{index}{previous_hash}{timestamp}{data}".encode()).hexdigest()
+        blocks[offset] = {
+            'index': index,
+            'timestamp': timestamp,
+            'data': data,
+            'previous_hash': previous_hash,
+            'hash': block_hash,
+        }
+        previous_hash = block_hash
+    return blocks
+
+
+def mine_genesis(clock: Callable[[], str] = utc_timestamp, algorithm: str = 'sha256') -> dict:
+    """The genesis block, tagged with the chain's digest algorithm."""
+    # Starts at zero, just like Bitcoin's genesis block
+    genesis = mine_block(0, '0' * 64, 'genesis', clock, algorithm=algorithm)
+    genesis['algorithm'] = algorithm
+    return genesis
+
+
+def mine_stream(events: Iterable[str], clock: Callable[[], str] = utc_timestamp,
+                algorithm: str = 'sha256') -> Iterator[dict]:
+    """
+    Yield the genesis block and then one mined block per event.
+    Only the previous hash is kept between blocks, so events can be
+    any iterable — including one far larger than memory.
+    """
+    block = mine_genesis(clock, algorithm)
+    yield block
     for i, event in enumerate(events, start=1):
-        chain.append(mine_block(i, chain[-1]['hash'], event))
+        block = mine_block(i, block['hash'], event, clock, algorithm=algorithm)
+        yield block
+
+
+def build_chain(events: list[str], clock: Callable[[], str] = utc_timestamp,
+                algorithm: str = 'sha256') -> list[dict]:
+    """Build a hash chain from a list of events."""
+    chain = [mine_genesis(clock, algorithm)]
+    chain.extend(mine_blocks(events, chain[0]['hash'], start=1, clock=clock, algorithm=algorithm))
     return chain
 
 
-def verify_chain(chain: list[dict]) -> bool:
-    """Verify that the chain has not been tampered with."""
-    for i in range(1, len(chain)):
-        block = chain[i]
-        prev = chain[i - 1]
-        # Recompute expected hash
-        content = f"{block['index']}{block['previous_hash']}{block['timestamp']}{block['data']}"
-        expected = sha256(content)
-        if block['hash'] != expected:
-            return False
+def stream_chain(events: Iterable[str], sink: Union[str, IO[str]],
+                 algorithm: str = 'sha256') -> int:
+    """
+    Mine events straight into a JSON-lines sink (a path or a text file
+    object), one block per line, without holding the chain in memory.
+    Returns the number of blocks written, genesis included.
+    """
+    if isinstance(sink, (str, os.PathLike)):
+        with open(sink, 'w') as f:
+            return stream_chain(events, f, algorithm)
+    count = 0
+    for block in mine_stream(events, algorithm=algorithm):
+        sink.write(json.dumps(block) + '\n')
+        count += 1
+    return count
+
+
+def iter_chain(source: Union[str, IO[str]]) -> Iterator[dict]:
+    """Lazily read blocks back from a JSON-lines chain written by stream_chain."""
+    if isinstance(source, (str, os.PathLike)):
+        with open(source) as f:
+            yield from iter_chain(f)
+        return
+    for line in source:
+        if line.strip():
+            yield json.loads(line)
+
+
+def block_hash(block: dict, algorithm: str = 'sha256') -> str:
+    """Recompute a block's hash from its own fields."""
+    content = f"{block['index']}{block['previous_hash']}{block['timestamp']}{block['data']}"
+    if 'nonce' in block:
+        content += f":{block['difficulty_bits']}:{block['nonce']}"
+    return digest(content, algorithm)
+
+
+def _first_invalid_in_range(blocks: Iterable[dict], start: int,
+                            algorithm: str = 'sha256') -> Optional[int]:
+    """
+    Check every block after the first against its own hash and the block
+    before it. The first block is the boundary block of the previous range
+    (or genesis) and is only used for the link check. Returns an absolute
+    chain index. blocks may be a list or a lazy iterator such as iter_chain.
+    """
+    blocks = iter(blocks)
+    prev = next(blocks, None)
+    for offset, block in enumerate(blocks, start=1):
+        if block['hash'] != block_hash(block, algorithm):
+            return start + offset
         if block['previous_hash'] != prev['hash']:
+            return start + offset
+        if 'nonce' in block and not meets_target(block['hash'], block['difficulty_bits']):
+            return start + offset
+        prev = block
+    return None
+
+
+_verify_chain = None
+
+
+def _init_verify_worker(chain):
+    global _verify_chain
+    _verify_chain = chain
+
+
+def _first_invalid_in_shared(start: int, stop: int, algorithm: str) -> Optional[int]:
+    """_first_invalid_in_range over blocks [start, stop) of the forked chain."""
+    return _first_invalid_in_range(_verify_chain[start:stop], start, algorithm)
+
+
+def first_invalid_block(chain: Iterable[dict], workers: int = 1,
+                        executor: str = 'process') -> Optional[int]:
+    """
+    Return the index of the first block that fails verification, or None.
+
+    Each block's hash depends only on its own fields, so with workers > 1
+    the chain is split into contiguous ranges that are checked in parallel.
+    Every range carries the last block of the range before it, so the links
+    across range boundaries are checked too. executor is 'process' (the
+    default — blocks are small, so hashing them holds the GIL) or 'thread'.
+    Where processes can be forked, the workers inherit the chain and are
+    sent only (start, stop) pairs; pickling the blocks to them would cost
+    the parent about as much as verifying them itself.
+    Only a Sequence can be split into ranges: any other iterable of blocks,
+    e.g. iter_chain, is checked serially whatever workers is.
+    The digest algorithm is taken from the genesis block.
+    """
+    if workers <= 1 or not isinstance(chain, Sequence) or len(chain) < 2 * workers:
+        blocks = iter(chain)
+        genesis = next(blocks, None)
+        if genesis is None:
+            return None
+        try:
+            algorithm = chain_algorithm(genesis)
+        except ValueError:
+            return 0
+        return _first_invalid_in_range(itertools.chain([genesis], blocks), 0, algorithm)
+
+    try:
+        algorithm = chain_algorithm(chain[0])
+    except ValueError:
+        return 0
+    step = -(-(len(chain) - 1) // workers)
+    starts = range(0, len(chain) - 1, step)
+    if executor != 'process':
+        pool = ThreadPoolExecutor(max_workers=workers)
+        jobs = [(_first_invalid_in_range, chain[s:s + step + 1], s, algorithm) for s in starts]
+    elif 'fork' in multiprocessing.get_all_start_methods():
+        pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('fork'),
+                                   initializer=_init_verify_worker, initargs=(chain,))
+        jobs = [(_first_invalid_in_shared, s, s + step + 1, algorithm) for s in starts]
+    else:
+        pool = ProcessPoolExecutor(max_workers=workers)
+        jobs = [(_first_invalid_in_range, chain[s:s + step + 1], s, algorithm) for s in starts]
+    with pool:
+        futures = [pool.submit(*job) for job in jobs]
+        # Ranges are in chain order, so the first range that reports wins
+        for future in futures:
+            failed = future.result()
+            if failed is not None:
+                for rest in futures:
+                    rest.cancel()
+                return failed
+    return None
+
+
+def verify_chain(chain: Iterable[dict], workers: int = 1) -> bool:
+    """Verify that the chain has not been tampered with."""
+    return first_invalid_block(chain, workers=workers) is None
+
+
+def benchmark_digests(payload_mb: int = 16, n_blocks: int = 20000) -> dict:
+    """
+    Raw throughput (MB/s over 1 MiB payloads) and chain throughput
+    (blocks/s for build + verify) of each digest algorithm on this machine.
+    """
+    payload = os.urandom(1 << 20)
+    events = [f"event {i}" for i in range(n_blocks)]
+    clock = frozen_clock()
+    results = {}
+    for name, new_hash in DIGEST_ALGORITHMS.items():
+        started = time.perf_counter()
+        for _ in range(payload_mb):
+            new_hash(payload).digest()
+        hash_seconds = time.perf_counter() - started
+
+        started = time.perf_counter()
+        chain = build_chain(events, clock=clock, algorithm=name)
+        verify_chain(chain)
+        chain_seconds = time.perf_counter() - started
+        results[name] = {
+            'mb_per_s': payload_mb / hash_seconds,
+            'blocks_per_s': len(chain) / chain_seconds,
+        }
+    return results
+
+
+# ── Proof of Work ────────────────────────────────────────────────────────────
+# Bitcoin's chain is anchored by work: a nonce is searched until the block
+# hash falls below a target. Everything before the nonce is fixed, so the
+# SHA-256 state after that prefix is computed once and .copy()'d for each
+# nonce. With workers > 1 the search runs on a process pool over disjoint
+# nonce chunks. Once the parent collects a chunk that found a nonce it sets
+# a shared event, and chunks still running stop within a few thousand
+# hashes. difficulty_bits must be 1..255: 256 would be a target no hash
+# can meet.
+
+POW_CHUNK_SIZE = 1 << 16
+_pow_stop = None
+
+
+def meets_target(hex_hash: str, difficulty_bits: int) -> bool:
+    return int(hex_hash, 16) < 1 << (256 - difficulty_bits)
+
+
+def _init_pow_worker(stop_event):
+    global _pow_stop
+    _pow_stop = stop_event
+
+
+def _search_nonces(prefix: bytes, difficulty_bits: int, start: int, stop: int,
+                   algorithm: str = 'sha256') -> tuple[Optional[int], int]:
+    """Try nonces in [start, stop). Returns (nonce or None, hashes tried)."""
+    midstate = DIGEST_ALGORITHMS[algorithm](prefix)
+    target = 1 << (256 - difficulty_bits)
+    for nonce in range(start, stop):
+        if (nonce - start) & 0xFFF == 0 and _pow_stop is not None and _pow_stop.is_set():
+            return None, nonce - start
+        h = midstate.copy()
+        h.update(b'%d' % nonce)
+        if int.from_bytes(h.digest(), 'big') < target:
+            return nonce, nonce - start + 1
+    return None, stop - start
+
+
+def proof_of_work(prefix: bytes, difficulty_bits: int, workers: int = 1,
+                  chunk_size: int = POW_CHUNK_SIZE,
+                  algorithm: str = 'sha256') -> tuple[int, int, float]:
+    """
+    Find a nonce such that hash(prefix + nonce) is below the target.
+    Returns (nonce, hashes tried, seconds elapsed).
+    """
+    if not 1 <= difficulty_bits <= 255:
+        raise ValueError(f"difficulty_bits must be between 1 and 255, got {difficulty_bits}")
+    started = time.perf_counter()
+    hashes = 0
+    if workers <= 1:
+        chunk = 0
+        while True:
+            nonce, tried = _search_nonces(prefix, difficulty_bits, chunk * chunk_size,
+                                          (chunk + 1) * chunk_size, algorithm)
+            hashes += tried
+            if nonce is not None:
+                return nonce, hashes, time.perf_counter() - started
+            chunk += 1
+
+    ctx = multiprocessing.get_context()
+    stop_event = ctx.Event()
+    found = None
+    with ProcessPoolExecutor(max_workers=workers, mp_context=ctx,
+                             initializer=_init_pow_worker, initargs=(stop_event,)) as pool:
+        next_chunk = 0
+        pending = set()
+        while found is None:
+            while len(pending) < 2 * workers:
+                pending.add(pool.submit(_search_nonces, prefix, difficulty_bits, next_chunk * chunk_size,
+                                        (next_chunk + 1) * chunk_size, algorithm))
+                next_chunk += 1
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                nonce, tried = future.result()
+                hashes += tried
+                if nonce is not None and (found is None or nonce < found):
+                    found = nonce
+        stop_event.set()
+        for future in pending:
+            if not future.cancel():
+                nonce, tried = future.result()
+                hashes += tried
+    return found, hashes, time.perf_counter() - started
+
+
+def benchmark_pow(difficulty_bits: int = 16, workers: int = 1, trials: int = 3) -> dict:
+    """Sustained mining throughput on this machine, in hashes per second."""
+    hashes, seconds = 0, 0.0
+    for trial in range(trials):
+        _, tried, elapsed = proof_of_work(b'benchmark:%d:' % trial, difficulty_bits, workers)
+        hashes += tried
+        seconds += elapsed
+    return {
+        'difficulty_bits': difficulty_bits,
+        'workers': workers,
+        'hashes': hashes,
+        'seconds': seconds,
+        'hashes_per_second': hashes / seconds if seconds else 0.0,
+    }
+
+
+# ── Forks and Ancestry ───────────────────────────────────────────────────────
+# Two replicas of a chain can diverge. BlockStore keeps blocks by hash, so
+# any number of branches can share a past, and gives every block skip
+# pointers to its ancestors 1, 2, 4, 8, ... blocks back. Walking those
+# pointers answers "is A an ancestor of B?" and "where did these two
+# branches split?" in O(log n) hash lookups instead of a scan.
+
+GENESIS_PREV = '0' * 64
+
+
+class BlockStore:
+    """A fork-aware block store with power-of-two skip-list back-pointers."""
+
+    def __init__(self, algorithm: str = 'sha256'):
+        self.algorithm = algorithm
+        self.blocks = {}      # hash -> block
+        self.skips = {}       # hash -> [ancestor 1 back, 2 back, 4 back, ...]
+        self.children = {}    # hash -> [child hashes]
+
+    def add(self, block: dict) -> bool:
+        """Add a block whose parent is already stored (or the genesis link)."""
+        h = block['hash']
+        if h in self.blocks:
+            return True
+        parent = block['previous_hash']
+        if block_hash(block, self.algorithm) != h:
             return False
-    return True
+        if parent == GENESIS_PREV:
+            if block['index'] != 0:
+                return False
+            skips = []
+        else:
+            if parent not in self.blocks or self.blocks[parent]['index'] != block['index'] - 1:
+                return False
+            # The ancestor 2^k back is the 2^(k-1)-back ancestor of the 2^(k-1)-back one
+            skips = [parent]
+            while len(self.skips[skips[-1]]) >= len(skips):
+                skips.append(self.skips[skips[-1]][len(skips) - 1])
+        self.blocks[h] = block
+        self.skips[h] = skips
+        self.children[h] = []
+        if parent in self.children:
+            self.children[parent].append(h)
+        return True
+
+    def add_chain(self, chain: list[dict]) -> bool:
+        return all(self.add(block) for block in chain)
+
+    def height(self, h: str) -> int:
+        return self.blocks[h]['index']
+
+    def ancestor(self, h: str, height: int) -> Optional[str]:
+        """The ancestor of block h at the given height (h itself at its own)."""
+        if not 0 <= height <= self.height(h):
+            return None
+        distance = self.height(h) - height
+        k = 0
+        while distance:
+            if distance & 1:
+                h = self.skips[h][k]
+            distance >>= 1
+            k += 1
+        return h
+
+    def is_ancestor(self, a: str, b: str) -> bool:
+        """True if block a is on the path from genesis to block b."""
+        return a in self.blocks and self.ancestor(b, self.height(a)) == a
+
+    def common_ancestor(self, a: str, b: str) -> Optional[str]:
+        """The last block two branches share — where they forked."""
+        height = min(self.height(a), self.height(b))
+        a, b = self.ancestor(a, height), self.ancestor(b, height)
+        if a == b:
+            return a
+        for k in range(len(self.skips[a]) - 1, -1, -1):
+            if k < len(self.skips[a]) and self.skips[a][k] != self.skips[b][k]:
+                a, b = self.skips[a][k], self.skips[b][k]
+        # Separate genesis blocks share nothing
+        return self.skips[a][0] if self.skips[a] else None
+
+    def tips(self) -> list[str]:
+        return [h for h, kids in self.children.items() if not kids]
+
+    def forks(self) -> list[str]:
+        """Blocks with more than one child: every point where history split."""
+        return [h for h, kids in self.children.items() if len(kids) > 1]
+
+
+# ── Avalanche Statistics ─────────────────────────────────────────────────────
+# One pair of messages says little about the avalanche effect. Here every
+# bit of many messages is flipped in turn and the two digests compared bit
+# by bit. The result is the overall flip rate (ideally 1/2) and a bias
+# matrix: how often output bit j flips when input bit i does. The NumPy
+# engine XORs raw digests in bulk and counts with unpackbits; the reference
+# engine does the same in plain Python, and both produce identical counts
+# for the same seed. Messages derive from (seed, k), so shards can be spread
+# across processes without changing the result.
+
+def _avalanche_message(seed: int, k: int, msg_len: int) -> bytes:
+    return hashlib.sha256(b'%d:%d' % (seed, k)).digest()[:msg_len]
+
+
+def _flipped(message: bytes, bit: int) -> bytes:
+    flipped = bytearray(message)
+    flipped[bit // 8] ^= 0x80 >> (bit % 8)
+    return bytes(flipped)
+
+
+def _avalanche_counts(seed: int, start: int, stop: int, msg_len: int,
+                      engine: str) -> tuple[list[list[int]], list[int]]:
+    """Flip counts [input bit][output bit] and a histogram of distances."""
+    sha, in_bits = hashlib.sha256, msg_len * 8
+    if engine == 'numpy':
+        counts = np.zeros((in_bits, 256), dtype=np.int64)
+        histogram = np.zeros(257, dtype=np.int64)
+        for k in range(start, stop):
+            message = _avalanche_message(seed, k, msg_len)
+            base = np.frombuffer(sha(message).digest(), dtype=np.uint8)
+            digests = np.frombuffer(b''.join(sha(_flipped(message, i)).digest()
+                                             for i in range(in_bits)), dtype=np.uint8)
+            diff = np.unpackbits(digests.reshape(in_bits, 32) ^ base, axis=1)
+            counts += diff
+            histogram += np.bincount(diff.sum(axis=1), minlength=257)
+        return counts.tolist(), histogram.tolist()
+
+    counts = [[0] * 256 for _ in range(in_bits)]
+    histogram = [0] * 257
+    for k in range(start, stop):
+        message = _avalanche_message(seed, k, msg_len)
+        base = int.from_bytes(sha(message).digest(), 'big')
+        for i in range(in_bits):
+            diff = base ^ int.from_bytes(sha(_flipped(message, i)).digest(), 'big')
+            histogram[bin(diff).count('1')] += 1
+            row = counts[i]
+            for j in range(256):
+                if diff >> (255 - j) & 1:
+                    row[j] += 1
+    return counts, histogram
+
+
+def avalanche_stats(n_messages: int = 1000, msg_len: int = 8, seed: int = 0,
+                    workers: int = 1, engine: Optional[str] = None) -> dict:
+    """
+    Bit-level avalanche statistics for SHA-256 over n_messages random
+    messages of msg_len bytes (at most 32), each flipped at every bit.
+    engine is 'numpy' (the default when NumPy is installed) or 'reference'.
+    """
+    if n_messages < 1:
+        raise ValueError(f"n_messages must be at least 1, got {n_messages}")
+    if not 1 <= msg_len <= 32:
+        raise ValueError(f"msg_len must be between 1 and 32 bytes, got {msg_len}")
+    if engine is None:
+        engine = 'numpy' if np is not None else 'reference'
+    in_bits = msg_len * 8
+    step = -(-n_messages // max(workers, 1))
+    shards = [(seed, lo, min(lo + step, n_messages), msg_len, engine)
+              for lo in range(0, n_messages, step)]
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_avalanche_counts, *zip(*shards)))
+    else:
+        results = [_avalanche_counts(*shard) for shard in shards]
+
+    counts = [[0] * 256 for _ in range(in_bits)]
+    histogram = [0] * 257
+    for shard_counts, shard_histogram in results:
+        for row, shard_row in zip(counts, shard_counts):
+            for j, c in enumerate(shard_row):
+                row[j] += c
+        histogram = [a + b for a, b in zip(histogram, shard_histogram)]
+
+    samples = n_messages * in_bits
+    mean = sum(d * n for d, n in enumerate(histogram)) / samples
+    variance = sum((d - mean) ** 2 * n for d, n in enumerate(histogram)) / samples
+    bias = [[c / n_messages for c in row] for row in counts]
+    return {
+        'engine': engine,
+        'samples': samples,
+        'mean_flip_rate': mean / 256,
+        'std_flipped_bits': math.sqrt(variance),
+        'min_flipped_bits': min(d for d, n in enumerate(histogram) if n),
+        'max_flipped_bits': max(d for d, n in enumerate(histogram) if n),
+        'histogram': histogram,
+        'bias_matrix': bias,
+        'max_bias': max(abs(p - 0.5) for row in bias for p in row),
+    }
+
+
+# ── Incremental Verification ─────────────────────────────────────────────────
+# A chain only grows. Once a prefix has been verified, a saved watermark —
+# the index and hash of the last verified block — lets the next run check
+# only the new suffix. Rewriting anything at or before the watermark
+# changes the watermark block's hash (or breaks the link into it), so the
+# saved tip still anchors the whole verified prefix.
+
+def load_watermark(path: str) -> Optional[dict]:
+    """Read a saved {'index', 'hash'} watermark, or None if there is none."""
+    if not os.path.exists(path):
+        return None
+    with open(path) as f:
+        return json.load(f)
+
+
+def save_watermark(path: str, index: int, block_hash: str):
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump({'index': index, 'hash': block_hash}, f)
+    os.replace(tmp, path)
+
+
+def verify_chain_incremental(chain: list[dict], watermark_path: str) -> Optional[int]:
+    """
+    Verify only the blocks added since the last successful run.
+    Returns the first failing index (None if valid) and advances the
+    watermark to the tip when the chain verifies.
+    """
+    watermark = load_watermark(watermark_path)
+    start = 0
+    if watermark is not None:
+        start = watermark['index']
+        if start >= len(chain) or chain[start]['hash'] != watermark['hash']:
+            # The verified prefix was truncated or rewritten
+            return min(start, len(chain))
+    try:
+        algorithm = chain_algorithm(chain[0]) if chain else 'sha256'
+    except ValueError:
+        return 0
+    failed = _first_invalid_in_range(chain[start:], start, algorithm)
+    if failed is None and chain:
+        save_watermark(watermark_path, len(chain) - 1, chain[-1]['hash'])
+    return failed
+
+
+# ── Merkle Checkpoints ───────────────────────────────────────────────────────
+# Proving one block is in the chain should not require replaying it from
+# genesis. Block hashes are grouped into fixed-size epochs; each epoch gets
+# a Merkle root, and the epoch roots get a Merkle root of their own. An
+# inclusion proof is then two short sibling paths: O(log n) hashes.
+# Leaves and nodes are domain-separated (0x00 / 0x01, as in RFC 6962) so an
+# interior node can never be passed off as a leaf.
+
+MERKLE_EPOCH_SIZE = 1024
+
+
+def _merkle_leaf(data: bytes) -> bytes:
+    return hashlib.sha256(b'\x00' + data).digest()
+
+
+def _merkle_node(left: bytes, right: bytes) -> bytes:
+    return hashlib.sha256(b'\x01' + left + right).digest()
+
+
+def merkle_levels(leaves: list[bytes]) -> list[list[bytes]]:
+    """All levels of a Merkle tree, leaf hashes first and the root last."""
+    level = [_merkle_leaf(leaf) for leaf in leaves] or [_merkle_leaf(b'')]
+    levels = [level]
+    while len(level) > 1:
+        # An odd node out is promoted unchanged to the next level
+        level = [_merkle_node(level[i], level[i + 1]) if i + 1 < len(level) else level[i]
+                 for i in range(0, len(level), 2)]
+        levels.append(level)
+    return levels
+
+
+def merkle_root(leaves: list[bytes]) -> bytes:
+    return merkle_levels(leaves)[-1][0]
+
+
+def merkle_path(levels: list[list[bytes]], index: int) -> list[tuple[str, str]]:
+    """Sibling path from leaf `index` to the root, as (side, hex) pairs."""
+    path = []
+    for level in levels[:-1]:
+        sibling = index ^ 1
+        if sibling < len(level):
+            path.append(('L' if sibling < index else 'R', level[sibling].hex()))
+        index //= 2
+    return path
+
+
+def merkle_climb(leaf: bytes, path: list[tuple[str, str]]) -> bytes:
+    """Recompute the root implied by a leaf and its sibling path."""
+    node = _merkle_leaf(leaf)
+    for side, sibling in path:
+        sibling = bytes.fromhex(sibling)
+        node = _merkle_node(sibling, node) if side == 'L' else _merkle_node(node, sibling)
+    return node
+
+
+def _epoch_leaves(chain: list[dict], epoch: int, epoch_size: int) -> list[bytes]:
+    return [bytes.fromhex(b['hash']) for b in chain[epoch * epoch_size:(epoch + 1) * epoch_size]]
+
+
+def build_checkpoints(chain: list[dict], epoch_size: int = MERKLE_EPOCH_SIZE) -> dict:
+    """Build the Merkle checkpoint index for a chain."""
+    epoch_roots = [merkle_root(_epoch_leaves(chain, e, epoch_size))
+                   for e in range(-(-len(chain) // epoch_size))]
+    return {
+        'epoch_size': epoch_size,
+        'length': len(chain),
+        'epoch_roots': [r.hex() for r in epoch_roots],
+        'epoch_tips': [chain[min((e + 1) * epoch_size, len(chain)) - 1]['hash']
+                       for e in range(len(epoch_roots))],
+        'root': merkle_root(epoch_roots).hex(),
+        # The epoch leaves, kept so locate_tamper can name a rewritten block
+        'block_hashes': [b['hash'] for b in chain],
+    }
+
+
+def inclusion_proof(chain: list[dict], index: int, checkpoints: dict) -> dict:
+    """
+    Prove that chain[index] is committed to by checkpoints['root'].
+    Only the block's own epoch is rehashed to build the proof.
+    """
+    epoch_size = checkpoints['epoch_size']
+    epoch, offset = divmod(index, epoch_size)
+    block_levels = merkle_levels(_epoch_leaves(chain, epoch, epoch_size))
+    epoch_levels = merkle_levels([bytes.fromhex(r) for r in checkpoints['epoch_roots']])
+    return {
+        'index': index,
+        'hash': chain[index]['hash'],
+        'epoch': epoch,
+        'block_path': merkle_path(block_levels, offset),
+        'epoch_path': merkle_path(epoch_levels, epoch),
+    }
+
+
+def verify_inclusion(block: dict, proof: dict, root: str, algorithm: str = 'sha256') -> bool:
+    """
+    Check a single block against a trusted checkpoint root in O(log n)
+    hashes, without the rest of the chain.
+    """
+    if block['hash'] != proof['hash'] or block_hash(block, algorithm) != block['hash']:
+        return False
+    epoch_root = merkle_climb(bytes.fromhex(block['hash']), proof['block_path'])
+    return merkle_climb(epoch_root, proof['epoch_path']).hex() == root
+
+
+def checkpoint_path(chain_path: str) -> str:
+    """Checkpoints are stored next to the chain they index."""
+    return chain_path + '.merkle.json'
+
+
+def save_checkpoints(checkpoints: dict, chain_path: str) -> str:
+    path = checkpoint_path(chain_path)
+    with open(path, 'w') as f:
+        json.dump(checkpoints, f)
+    return path
+
+
+def load_checkpoints(chain_path: str) -> dict:
+    with open(checkpoint_path(chain_path)) as f:
+        return json.load(f)
+
+
+# ── Tamper Localization ──────────────────────────────────────────────────────
+# A rewritten block changes its own hash and, once the chain is re-linked,
+# every hash after it. So against the stored epoch tips, corruption shows
+# up as a suffix: every epoch tip from the first rewritten epoch onward
+# differs. Bisecting on the tips finds that epoch in O(log n) lookups, and
+# that one epoch is then scanned block by block against the block hashes
+# the checkpoints also keep, naming the exact index and field even when
+# the rewrite is internally consistent. A block edited in place without
+# re-hashing changes no hash at all, so bisection cannot see it, wherever
+# it is: by default the blocks before the rewritten epoch (or the whole
+# chain, if every tip matches) are scanned too, so the answer is always
+# the first fault and None always means the chain checked out.
+
+def block_fault(block: dict, prev: Optional[dict], algorithm: str = 'sha256') -> Optional[str]:
+    """The first field of block that no longer matches, or None."""
+    expected_index = prev['index'] + 1 if prev is not None else 0
+    if block['index'] != expected_index:
+        return 'index'
+    if block['previous_hash'] != (prev['hash'] if prev is not None else GENESIS_PREV):
+        return 'previous_hash'
+    if block_hash(block, algorithm) != block['hash']:
+        return 'hash'
+    if 'nonce' in block and not meets_target(block['hash'], block['difficulty_bits']):
+        return 'nonce'
+    return None
+
+
+def locate_tamper(chain: list[dict], checkpoints: dict, scan: bool = True) -> Optional[dict]:
+    """
+    Bisect over checkpoint epoch tips to the first rewritten epoch, then
+    scan it. Returns {'index', 'field', 'epoch'} for the first fault, or
+    None for a clean chain. field is one of block_fault's names, 'missing'
+    for a truncated chain, 'algorithm' for a genesis tag naming no known
+    digest, or 'checkpoint' for a block that is internally consistent but
+    whose hash differs from the checkpointed one (the first block of a
+    re-linked rewrite).
+    With scan=False only the checkpoints are consulted, in O(log n) lookups
+    plus one epoch: an in-place edit before the rewritten epoch is not
+    seen, so the result is the first rewrite rather than the first fault,
+    and if every tip matches it is {'index': None, 'field': 'unchecked',
+    'epoch': None}. Checkpoints saved without block hashes narrow a
+    consistent rewrite only to its epoch's first block.
+    """
+    epoch_size, tips = checkpoints['epoch_size'], checkpoints['epoch_tips']
+    hashes = checkpoints.get('block_hashes')
+    try:
+        algorithm = chain_algorithm(chain[0]) if chain else 'sha256'
+    except ValueError:
+        return {'index': 0, 'field': 'algorithm', 'epoch': 0}
+
+    def tip_index(e: int) -> int:
+        return min((e + 1) * epoch_size, checkpoints['length']) - 1
+
+    def tip_matches(e: int) -> bool:
+        i = tip_index(e)
+        return i < len(chain) and chain[i]['hash'] == tips[e]
+
+    def first_fault(start: int, stop: int) -> Optional[dict]:
+        prev = chain[start - 1] if start else None
+        for i in range(start, min(stop, len(chain))):
+            fault = block_fault(chain[i], prev, algorithm)
+            if fault is None and hashes is not None and i < len(hashes) \
+                    and chain[i]['hash'] != hashes[i]:
+                fault = 'checkpoint'
+            if fault is not None:
+                return {'index': i, 'field': fault, 'epoch': i // epoch_size}
+            prev = chain[i]
+        return None
+
+    lo, hi = 0, len(tips)
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if tip_matches(mid):
+            lo = mid + 1
+        else:
+            hi = mid
+    if lo == len(tips):
+        if not scan:
+            return {'index': None, 'field': 'unchecked', 'epoch': None}
+        return first_fault(0, len(chain))
+
+    start, stop = lo * epoch_size, tip_index(lo) + 1
+    found = (first_fault(0, start) if scan else None) or first_fault(start, stop)
+    if found is not None:
+        return found
+    if stop > len(chain):
+        return {'index': len(chain), 'field': 'missing', 'epoch': lo}
+    return {'index': start, 'field': 'checkpoint', 'epoch': lo}
+
+
+# ── Aggregated Witnessing ───────────────────────────────────────────────────
+# One block per record means millions of blocks for millions of records.
+# As OpenTimestamps does, a whole batch of records is folded into a single
+# Merkle root and one block commits to that root. Each record gets a
+# receipt — its sibling path to the root — that proves it was witnessed
+# by that block, so throughput grows with the batch size.
+
+def witness_batch(chain: list[dict], records: list[str],
+                  clock: Callable[[], str] = utc_timestamp) -> list[dict]:
+    """
+    Append one block committing to the Merkle root of records.
+    Returns one inclusion receipt per record, in order.
+    """
+    if not records:
+        raise ValueError("witness_batch needs at least one record")
+    levels = merkle_levels([record.encode() for record in records])
+    root = levels[-1][0].hex()
+    block = mine_block(len(chain), chain[-1]['hash'], f"merkle:{root}", clock,
+                       algorithm=chain_algorithm(chain[0]))
+    chain.append(block)
+    return [{
+        'block_index': block['index'],
+        'block_hash': block['hash'],
+        'root': root,
+        'path': merkle_path(levels, i),
+    } for i in range(len(records))]
+
+
+def verify_receipt(record: str, receipt: dict, block: dict, algorithm: str = 'sha256') -> bool:
+    """Check that record was committed to by block, via its receipt."""
+    return (merkle_climb(record.encode(), receipt['path']).hex() == receipt['root']
+            and block['data'] == f"merkle:{receipt['root']}"
+            and block['hash'] == receipt['block_hash']
+            and block_hash(block, algorithm) == block['hash'])
+
+
+# ── Large Payloads ───────────────────────────────────────────────────────────
+# Witnessing a multi-gigabyte artifact should not mean reading it into one
+# Python string. hash_file memory-maps the file, hashes fixed-size chunks
+# on a thread pool (hashlib releases the GIL for inputs this large), and
+# roots the chunk digests in the same domain-separated Merkle tree used for
+# checkpoints. The block then commits only to that root and the size.
+
+FILE_CHUNK_SIZE = 1 << 22  # 4 MiB
+
+
+def hash_file(path: str, chunk_size: int = FILE_CHUNK_SIZE,
+              workers: Optional[int] = None) -> dict:
+    """
+    Merkle root over the SHA-256 digests of the file's chunk_size chunks.
+    The root depends only on the file's bytes and chunk_size.
+    """
+    size = os.path.getsize(path)
+    if size == 0:
+        return {'root': merkle_root([hashlib.sha256(b'').digest()]).hex(),
+                'size': 0, 'chunk_size': chunk_size, 'chunks': 1}
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        view = memoryview(mm)
+
+        def hash_chunk(offset: int) -> bytes:
+            with view[offset:offset + chunk_size] as chunk:
+                return hashlib.sha256(chunk).digest()
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                digests = list(pool.map(hash_chunk, range(0, size, chunk_size)))
+        finally:
+            view.release()
+    return {'root': merkle_root(digests).hex(), 'size': size,
+            'chunk_size': chunk_size, 'chunks': len(digests)}
+
+
+def witness_file(chain: list[dict], path: str, clock: Callable[[], str] = utc_timestamp,
+                 chunk_size: int = FILE_CHUNK_SIZE) -> dict:
+    """Append a block committing to a file's hash-tree root and size."""
+    tree = hash_file(path, chunk_size)
+    block = mine_block(len(chain), chain[-1]['hash'], f"file:{tree['root']}:{tree['size']}",
+                       clock, algorithm=chain_algorithm(chain[0]))
+    chain.append(block)
+    return block
+
+
+# ── Compact Blocks ───────────────────────────────────────────────────────────
+# A dict block carries two 64-character hex strings, a str timestamp and a
+# dict's worth of overhead. Block keeps everything in a single bytes buffer:
+# a packed fixed-width header (index, raw 32-byte digests, field lengths)
+# followed by the UTF-8 timestamp and data. Hex is rendered only when
+# serialized. The hash is fed to hashlib from memoryviews over that buffer
+# and is bit-for-bit the same as block_hash() of the dict form, so the two
+# representations convert freely. Compact blocks are SHA-256 only and have
+# no room for a proof of work: from_dict refuses blocks of other digest
+# algorithms and mined blocks rather than dropping what makes them verify.
+# The gain is memory, not speed: hashing dominates both forms, so building
+# and verifying compact blocks take about as long as with dicts.
+
+_BLOCK_HEADER = struct.Struct('>Q32s32sHI')  # index, previous_hash, hash, len(ts), len(data)
+_HDR = _BLOCK_HEADER.size
+# Single header fields, so reading one does not unpack (and copy) the rest
+_INDEX = struct.Struct('>Q')
+_TS_LEN = struct.Struct('>H')
+_TS_LEN_AT = 72
+GENESIS_DIGEST = bytes(32)
+
+
+def block_digest(index: int, previous_hash, timestamp, data) -> bytes:
+    """Raw SHA-256 of a block from bytes-like fields, no content string."""
+    h = hashlib.sha256(b'%d' % index)
+    h.update(binascii.hexlify(previous_hash))
+    h.update(timestamp)
+    h.update(data)
+    return h.digest()
+
+
+class Block:
+    """A block packed into one immutable bytes buffer with raw digests."""
+
+    __slots__ = ('_buf',)
+
+    def __init__(self, buf: bytes):
+        self._buf = buf
+
+    @classmethod
+    def create(cls, index: int, previous_hash: bytes, timestamp: bytes, data: bytes,
+               digest: Optional[bytes] = None) -> 'Block':
+        if digest is None:
+            digest = block_digest(index, previous_hash, timestamp, data)
+        header = _BLOCK_HEADER.pack(index, previous_hash, digest, len(timestamp), len(data))
+        return cls(header + timestamp + data)
+
+    @property
+    def index(self) -> int:
+        return _INDEX.unpack_from(self._buf)[0]
+
+    @property
+    def previous_hash(self) -> bytes:
+        return self._buf[8:40]
+
+    @property
+    def hash(self) -> bytes:
+        return self._buf[40:72]
+
+    @property
+    def timestamp(self) -> str:
+        ts_len = _TS_LEN.unpack_from(self._buf, _TS_LEN_AT)[0]
+        return self._buf[_HDR:_HDR + ts_len].decode()
+
+    @property
+    def data(self) -> str:
+        ts_len = _TS_LEN.unpack_from(self._buf, _TS_LEN_AT)[0]
+        return self._buf[_HDR + ts_len:].decode()
+
+    def recompute(self) -> bytes:
+        # timestamp and data sit next to each other, so one view covers both
+        buf = self._buf
+        return block_digest(_INDEX.unpack_from(buf)[0], buf[8:40], b'', memoryview(buf)[_HDR:])
+
+    def to_dict(self) -> dict:
+        buf = self._buf
+        index, previous_hash, digest, ts_len, _ = _BLOCK_HEADER.unpack_from(buf)
+        return {
+            'index': index,
+            'timestamp': buf[_HDR:_HDR + ts_len].decode(),
+            'data': buf[_HDR + ts_len:].decode(),
+            'previous_hash': previous_hash.hex(),
+            'hash': digest.hex(),
+        }
+
+    @classmethod
+    def from_dict(cls, block: dict) -> 'Block':
+        if block.get('algorithm', 'sha256') != 'sha256':
+            raise ValueError(f"compact blocks are SHA-256 only, not {block['algorithm']}")
+        if 'nonce' in block or 'difficulty_bits' in block:
+            raise ValueError("compact blocks cannot carry a proof of work")
+        return cls.create(block['index'], bytes.fromhex(block['previous_hash']),
+                          block['timestamp'].encode(), block['data'].encode(),
+                          bytes.fromhex(block['hash']))
+
+    def to_bytes(self) -> bytes:
+        return self._buf
+
+    @classmethod
+    def from_bytes(cls, buf: bytes) -> 'Block':
+        ts_len, data_len = _BLOCK_HEADER.unpack_from(buf)[3:]
+        return cls(bytes(buf[:_HDR + ts_len + data_len]))
+
+    def __eq__(self, other):
+        if not isinstance(other, Block):
+            return NotImplemented
+        return self._buf == other._buf
+
+    def __repr__(self):
+        return f"Block(index={self.index}, hash={self.hash.hex()[:16]}...)"
+
+
+def mine_compact_block(index: int, previous_hash: bytes, data: str,
+                       clock: Callable[[], str] = utc_timestamp) -> Block:
+    """Compact counterpart of mine_block."""
+    timestamp = clock().encode()
+    return Block.create(index, previous_hash, timestamp, data.encode())
+
+
+def build_compact_chain(events: Iterable[str],
+                        clock: Callable[[], str] = utc_timestamp) -> list[Block]:
+    """
+    Compact counterpart of build_chain. Like mine_blocks it binds what the
+    loop calls once, and it carries each digest, raw and in hex, straight
+    into the next block instead of reading it back out of the buffer.
+    """
+    sha, hexlify, pack = hashlib.sha256, binascii.hexlify, _BLOCK_HEADER.pack
+    chain = [mine_compact_block(0, GENESIS_DIGEST, 'genesis', clock)]
+    prev = chain[0].hash
+    prev_hex = hexlify(prev)
+    for index, event in enumerate(events, start=1):
+        timestamp, data = clock().encode(), event.encode()
+        digest = sha(b'%d%b%b%b' % (index, prev_hex, timestamp, data)).digest()
+        chain.append(Block(pack(index, prev, digest, len(timestamp), len(data)) + timestamp + data))
+        prev, prev_hex = digest, hexlify(digest)
+    return chain
+
+
+def first_invalid_compact(chain: list[Block]) -> Optional[int]:
+    """Compact counterpart of first_invalid_block, comparing raw digests."""
+    sha, hexlify, index_of = hashlib.sha256, binascii.hexlify, _INDEX.unpack_from
+    if not chain:
+        return None
+    prev = chain[0]._buf[40:72]
+    prev_hex = hexlify(prev)
+    for i in range(1, len(chain)):
+        buf = chain[i]._buf
+        digest = sha(b'%d%b%b' % (index_of(buf)[0], prev_hex, buf[_HDR:])).digest()
+        # Once the link and hash match, the recomputed digest is this block's hash
+        if buf[8:40] != prev or buf[40:72] != digest:
+            return i
+        prev, prev_hex = digest, hexlify(digest)
+    return None
 
 
 def demonstrate_time_properties():
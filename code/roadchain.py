@@ -20,16 +20,51 @@ A personal instance of pi.
 Author: BlackRoad OS, Inc.
 """
 
+import codecs
+import itertools
 import json
+import math
 import os
-import hashlib
+import queue
+import random
+import re
+import sys
+import threading
+import time
+from collections.abc import Sequence
+from concurrent.futures import Future, ProcessPoolExecutor, as_completed
 from datetime import datetime
+from typing import Callable, Iterable, Iterator, Optional
+
+from hashchain import DIGEST_ALGORITHMS, utc_timestamp
 
 
 CHAIN_PATH = os.path.expanduser('~/roadchain/chain-data.json')
 BITCOIN_GENESIS_HASH = '000000000019d6689c085ae165831e934ff763ae46a2a6c172b3f1b60a8ce26f'
 
 
+def block_hash(block: dict, algorithm: str = 'sha256') -> str:
+    """Recompute a RoadChain block's hash from its own fields."""
+    content = (f"{block['index']}{block['previous_hash']}{block['timestamp']}"
+               f"{block['sender']}{block['recipient']}{block['data']}")
+    return DIGEST_ALGORITHMS[algorithm](content.encode()).hexdigest()
+
+
+def make_block(index: int, previous_hash: str, timestamp: str, sender: str,
+               recipient: str, data: str, algorithm: str = 'sha256') -> dict:
+    """Create a RoadChain block linked to previous_hash."""
+    block = {
+        'index': index,
+        'timestamp': timestamp,
+        'sender': sender,
+        'recipient': recipient,
+        'data': data,
+        'previous_hash': previous_hash,
+    }
+    block['hash'] = block_hash(block, algorithm)
+    return block
+
+
 def load_chain(path: str = CHAIN_PATH) -> list[dict]:
     """Load the chain from disk."""
     if not os.path.exists(path):
@@ -38,25 +73,226 @@ def load_chain(path: str = CHAIN_PATH) -> list[dict]:
         return json.load(f)
 
 
-def chain_stats(chain: list[dict]) -> dict:
-    """Compute summary statistics for a chain."""
-    if not chain:
+# ── Streaming Load ───────────────────────────────────────────────────────────
+# The chain file is one JSON array of 157,077+ blocks. json.load parses all
+# of it before anything can run. iter_chain reads the array a chunk at a
+# time and hands out one block as soon as its closing brace arrives, so
+# memory is bounded by the chunk size and the largest single block.
+# iter_chain_offsets also reports where each block sits in the file, and
+# can resume from the end of an earlier block — the basis for sidecar
+# indexes and for tailing a growing chain.
+
+READ_CHUNK_SIZE = 1 << 16
+_WHITESPACE = ' \t\n\r'
+# A block cut off mid-token fails to parse at the start of a string that
+# never closes, or at a fragment of a literal, number or escape running to
+# the end of the data: a few characters, with no whitespace or punctuation.
+# Any other parse error is malformed.
+_TRUNCATION_SLACK = 16
+_TOKEN_BREAK = frozenset(_WHITESPACE + '{}[]",:')
+
+
+def _byte_len(text: str) -> int:
+    return len(text) if text.isascii() else len(text.encode())
+
+
+class ChainFormatError(ValueError):
+    """
+    A chain file that does not parse. offset is the file position of the
+    block that failed and error_offset that of the bad byte. truncated is
+    True when the file simply ends there, as it does while a block is
+    being written or after a crash tore the tail off; False when the bytes
+    can never become a valid block, however much is appended.
+    """
+
+    def __init__(self, message: str, offset: int, truncated: bool,
+                 error_offset: Optional[int] = None):
+        super().__init__(message)
+        self.offset = offset
+        self.error_offset = offset if error_offset is None else error_offset
+        self.truncated = truncated
+
+
+def iter_chain_offsets(path: str = CHAIN_PATH, start: int = 0,
+                       chunk_size: int = READ_CHUNK_SIZE) -> Iterator[tuple[int, int, dict]]:
+    """
+    Lazily yield (byte offset, byte length, block) for each block of a
+    chain file's top-level JSON array. start = 0 reads from the opening
+    bracket; any other start must be the end offset of an earlier block.
+    Raises ChainFormatError, with absolute file offsets, as soon as a block
+    is malformed or the file ends without the closing bracket.
+    """
+    if not os.path.exists(path):
+        return
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder('utf-8')()
+    with open(path, 'rb') as f:
+        f.seek(start)
+        buf, pos, offset = '', 0, start   # offset is the file position of buf[pos]
+
+        def fill() -> bool:
+            nonlocal buf, pos
+            data = f.read(chunk_size)
+            buf, pos = buf[pos:] + utf8.decode(data, final=not data), 0
+            return bool(data)
+
+        def skip(chars: str) -> str:
+            """Skip whitespace and chars; return the next significant char."""
+            nonlocal pos, offset
+            while True:
+                while pos < len(buf) and (buf[pos] in _WHITESPACE or buf[pos] in chars):
+                    pos += 1
+                    offset += 1
+                if pos < len(buf) or not fill():
+                    return buf[pos] if pos < len(buf) else ''
+
+        if start == 0:
+            c = skip('')
+            if c != '[':
+                raise ChainFormatError(f"{path}: expected a JSON array", offset, c == '')
+            pos += 1
+            offset += 1
+        while True:
+            c = skip(',')
+            if c == ']':
+                return
+            if c == '':
+                raise ChainFormatError(f"{path}: unterminated JSON array", offset, True)
+            while True:
+                try:
+                    block, end = decoder.raw_decode(buf, pos)
+                    break
+                except json.JSONDecodeError as err:
+                    error_offset = offset + _byte_len(buf[pos:err.pos])
+                    rest = buf[err.pos:]
+                    if not err.msg.startswith('Unterminated string') and (
+                            len(rest) >= _TRUNCATION_SLACK or not _TOKEN_BREAK.isdisjoint(rest)):
+                        # Reading further cannot fix it: stop here rather
+                        # than buffer the rest of the file
+                        raise ChainFormatError(
+                            f"{path}: malformed block at byte {error_offset}: {err.msg}",
+                            offset, False, error_offset) from err
+                    # The block straddles the end of the buffer
+                    if not fill():
+                        raise ChainFormatError(
+                            f"{path}: truncated block at byte {offset}",
+                            offset, True, error_offset) from err
+            length = _byte_len(buf[pos:end])
+            yield offset, length, block
+            pos, offset = end, offset + length
+
+
+def iter_chain(path: str = CHAIN_PATH, chunk_size: int = READ_CHUNK_SIZE) -> Iterator[dict]:
+    """Lazily yield the blocks of a chain file's top-level JSON array."""
+    for _, _, block in iter_chain_offsets(path, chunk_size=chunk_size):
+        yield block
+
+
+def read_block_at(path: str, offset: int, length: int) -> dict:
+    """Read one block straight from its byte range in a chain file."""
+    with open(path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+_BLOCK_START = re.compile(rb',\s*\{')
+
+
+def _block_at(path: str, offset: int) -> bool:
+    try:
+        for _, _, block in iter_chain_offsets(path, offset):
+            return isinstance(block, dict) and 'index' in block and 'hash' in block
+    except ValueError:
+        pass
+    return False
+
+
+def next_block_offset(path: str, after: int,
+                      chunk_size: int = READ_CHUNK_SIZE) -> Optional[int]:
+    """
+    Where parsing can resume past a malformed block: the offset of the
+    first separator after `after` that is followed by a complete block
+    (a valid start for iter_chain_offsets), or None if nothing after it
+    parses.
+    """
+    with open(path, 'rb') as f:
+        f.seek(after)
+        base, data, tried = after, b'', after
+        while chunk := f.read(chunk_size):
+            data += chunk
+            for match in _BLOCK_START.finditer(data):
+                candidate = base + match.start()
+                if candidate >= tried:
+                    tried = candidate + 1
+                    if _block_at(path, candidate):
+                        return candidate
+            # Keep the last separator: its brace may be in the next chunk
+            cut = data.rfind(b',')
+            cut = len(data) if cut < 0 else cut
+            base, data = base + cut, data[cut:]
+    return None
+
+
+def iter_chain_batches(path: str = CHAIN_PATH, batch_size: int = 1000) -> Iterator[list[dict]]:
+    """Like iter_chain, but in lists of up to batch_size blocks."""
+    blocks = iter_chain(path)
+    while batch := list(itertools.islice(blocks, batch_size)):
+        yield batch
+
+
+def chain_stats(chain: Iterable[dict]) -> dict:
+    """
+    Compute summary statistics for a chain. chain may be a list (or any
+    random-access sequence) or a lazy iterator such as iter_chain, which is
+    consumed in one pass.
+    """
+    if isinstance(chain, Sequence):
+        first, last, total = (chain[0], chain[-1], len(chain)) if chain else (None, None, 0)
+    else:
+        first = last = None
+        total = 0
+        for block in chain:
+            first = block if first is None else first
+            last = block
+            total += 1
+    if not total:
         return {}
     return {
-        'total_blocks': len(chain),
-        'first_block': chain[0].get('timestamp', 'unknown'),
-        'last_block': chain[-1].get('timestamp', 'unknown'),
-        'genesis_hash': chain[0].get('hash', '')[:16] + '...',
-        'tip_hash': chain[-1].get('hash', '')[:16] + '...',
+        'total_blocks': total,
+        'first_block': first.get('timestamp', 'unknown'),
+        'last_block': last.get('timestamp', 'unknown'),
+        'genesis_hash': first.get('hash', '')[:16] + '...',
+        'tip_hash': last.get('hash', '')[:16] + '...',
     }
 
 
-def verify_chain_integrity(chain: list[dict], sample_size: int = 100) -> dict:
-    """Spot-check chain integrity by verifying a sample of blocks."""
+def verify_chain_integrity(chain: Iterable[dict], sample_size: int = 100) -> dict:
+    """
+    Spot-check chain integrity by verifying a sample of blocks. A lazy
+    iterator has no random access, so there every link is checked as the
+    blocks stream past — no more work than reading them.
+    """
+    if not isinstance(chain, Sequence):
+        checked = errors = 0
+        prev = None
+        for block in chain:
+            if prev is not None:
+                checked += 1
+                if block.get('previous_hash') != prev.get('hash'):
+                    errors += 1
+            prev = block
+        if not checked:
+            return {'checked': 0, 'valid': True}
+        return {
+            'checked': checked,
+            'errors': errors,
+            'valid': errors == 0,
+            'sample_rate': f"{checked}/{checked}",
+        }
+
     if len(chain) < 2:
         return {'checked': 0, 'valid': True}
 
-    import random
     indices = sorted(random.sample(range(1, len(chain)), min(sample_size, len(chain) - 1)))
     errors = []
 
@@ -74,19 +310,685 @@ def verify_chain_integrity(chain: list[dict], sample_size: int = 100) -> dict:
     }
 
 
-def print_chain_summary(chain: list[dict]):
-    """Print a summary of the chain."""
+# ── Full Verification ────────────────────────────────────────────────────────
+# Sampling links says nothing about block contents. verify_chain_full
+# recomputes every block's hash from its fields (the layout demo_chain
+# uses) and checks every link. The chain is cut into contiguous shards;
+# each shard carries the block before it so its first link is checked
+# too, and the shards run on a process pool. Progress and throughput are
+# reported as shards finish.
+
+VERIFY_SHARD_SIZE = 10_000
+
+
+def block_ok(block: dict, prev: Optional[dict], algorithm: str = 'sha256') -> bool:
+    """True if block hashes to its own hash and links to prev."""
+    try:
+        if block_hash(block, algorithm) != block['hash']:
+            return False
+    except KeyError:
+        return False
+    return prev is None or block.get('previous_hash') == prev.get('hash')
+
+
+def _verify_shard(blocks: list[dict], start: int, algorithm: str) -> list[int]:
+    """
+    Failing indices among the shard's blocks. blocks[0] is the block before
+    the shard (only used for the link) unless the shard starts at genesis.
+    """
+    if start == 0:
+        blocks = [None] + blocks
+    failed = []
+    for offset in range(1, len(blocks)):
+        if not block_ok(blocks[offset], blocks[offset - 1], algorithm):
+            failed.append(start + offset - 1)
+    return failed
+
+
+def print_progress(done: int, total: int, blocks_per_s: float):
+    """Default progress reporter: one self-overwriting line on stderr."""
+    print(f"\r  Verified {done:,}/{total:,} blocks ({blocks_per_s:,.0f} blocks/s)",
+          end='' if done < total else '\n', file=sys.stderr, flush=True)
+
+
+def verify_chain_full(chain: Sequence[dict], workers: Optional[int] = None,
+                      shard_size: int = VERIFY_SHARD_SIZE,
+                      progress: Optional[Callable[[int, int, float], None]] = None) -> dict:
+    """
+    Recompute every block hash and check every link, on all cores.
+    progress(done, total, blocks_per_s) is called as each shard finishes.
+    Returns every failing index, in order.
+    """
+    total = len(chain)
+    algorithm = chain[0].get('algorithm', 'sha256') if total else 'sha256'
+    workers = workers or os.cpu_count() or 1
+    shards = [(list(chain[max(lo - 1, 0):lo + shard_size]), lo, algorithm)
+              for lo in range(0, total, shard_size)]
+    started = time.perf_counter()
+    failed, done = [], 0
+
+    def finished(lo: int, shard_failed: list[int]):
+        nonlocal done
+        failed.extend(shard_failed)
+        done += min(shard_size, total - lo)
+        if progress is not None:
+            elapsed = time.perf_counter() - started
+            progress(done, total, done / elapsed if elapsed else 0.0)
+
+    if workers <= 1:
+        for shard in shards:
+            finished(shard[1], _verify_shard(*shard))
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(_verify_shard, *shard): shard[1] for shard in shards}
+            for future in as_completed(futures):
+                finished(futures[future], future.result())
+
+    seconds = time.perf_counter() - started
+    failed.sort()
+    return {
+        'checked': total,
+        'errors': failed,
+        'valid': not failed,
+        'seconds': seconds,
+        'blocks_per_s': total / seconds if seconds else 0.0,
+    }
+
+
+# ── Sampled Verification ─────────────────────────────────────────────────────
+# A quick check should say something about the chain, not just count. The
+# index range is cut into strata and each gets its share of the sample, so
+# no stretch of the chain goes unexamined by chance; every sampled block
+# has its hash recomputed and its link checked. With x failures among m
+# sampled blocks, the one-sided Clopper-Pearson bound is the largest
+# tamper rate under which seeing so few failures still has probability at
+# least 1 - confidence. Sampling without replacement only makes that bound
+# conservative. Strata where failures turn up are then sampled again, more
+# densely each round, to locate the damage; those extra draws are not
+# uniform, so the rate and its bound come from the first round alone.
+
+def binomial_upper_bound(failures: int, trials: int, confidence: float = 0.95) -> float:
+    """One-sided Clopper-Pearson upper bound on a failure rate."""
+    if failures >= trials:
+        return 1.0
+    alpha = 1 - confidence
+
+    def cdf(p: float) -> float:
+        # P(X <= failures) for X ~ Binomial(trials, p), summed in log space
+        log_p, log_q = math.log(p), math.log1p(-p)
+        return sum(math.exp(math.lgamma(trials + 1) - math.lgamma(k + 1) - math.lgamma(trials - k + 1)
+                            + k * log_p + (trials - k) * log_q)
+                   for k in range(failures + 1))
+
+    lo, hi = failures / trials, 1.0
+    for _ in range(60):
+        mid = (lo + hi) / 2
+        if mid <= 0 or cdf(mid) > alpha:
+            lo = mid
+        else:
+            hi = mid
+    return hi
+
+
+def sample_size_for(max_rate: float, confidence: float = 0.95) -> int:
+    """Blocks to sample so a clean sample bounds the tamper rate below max_rate."""
+    return math.ceil(math.log(1 - confidence) / math.log1p(-max_rate))
+
+
+def verify_chain_sampled(chain: Sequence[dict], sample_size: int = 300, strata: int = 10,
+                         seed: Optional[int] = None, confidence: float = 0.95,
+                         adaptive_rounds: int = 3) -> dict:
+    """
+    Stratified spot check of a chain: recompute the hash and check the link
+    of sample_size blocks spread over strata equal index ranges. The same
+    seed draws the same blocks. Returns the failing indices found, the
+    estimated tamper rate and its upper bound at the given confidence.
+    """
+    n = len(chain)
+    algorithm = chain[0].get('algorithm', 'sha256') if n else 'sha256'
+    rng = random.Random(seed)
+    strata = max(1, min(strata, n))
+    bounds = [(n * h // strata, n * (h + 1) // strata) for h in range(strata)]
+    sampled = [set() for _ in bounds]
+    failed = [set() for _ in bounds]
+
+    def check(h: int, count: int, lo: int, hi: int) -> int:
+        """Sample count more unseen blocks of [lo, hi) in stratum h; return new failures."""
+        unseen = [i for i in range(lo, hi) if i not in sampled[h]] if sampled[h] else range(lo, hi)
+        new = 0
+        for i in rng.sample(unseen, min(count, len(unseen))):
+            sampled[h].add(i)
+            if not block_ok(chain[i], chain[i - 1] if i else None, algorithm):
+                failed[h].add(i)
+                new += 1
+        return new
+
+    # Round one: a share of the sample proportional to each stratum's size
+    shares = [round(sample_size * (hi - lo) / n) if n else 0 for lo, hi in bounds]
+    for h, share in enumerate(shares):
+        check(h, max(share, 1), *bounds[h])
+    first = [(len(sampled[h]), len(failed[h])) for h in range(strata)]
+    checked = sum(m for m, _ in first)
+    failures = sum(x for _, x in first)
+    rate = sum((hi - lo) / n * x / m for (lo, hi), (m, x) in zip(bounds, first) if m) if n else 0.0
+
+    # Later rounds: the same number of draws again, in a window around the
+    # failures that starts at one sampling gap either side and halves each
+    # round, so the damage around a hit is mapped ever more densely
+    hot = [h for h in range(strata) if failed[h]]
+    rounds = 1
+    while hot and rounds <= adaptive_rounds:
+        still_hot = []
+        for h in hot:
+            lo, hi = bounds[h]
+            reach = max((hi - lo) // (first[h][0] << (rounds - 1)), 1)
+            window = (max(min(failed[h]) - reach, lo), min(max(failed[h]) + reach + 1, hi))
+            if check(h, first[h][0], *window):
+                still_hot.append(h)
+        hot = still_hot
+        rounds += 1
+
+    errors = sorted(set().union(*failed))
+    return {
+        'checked': sum(len(s) for s in sampled),
+        'errors': errors,
+        'valid': not errors,
+        'seed': seed,
+        'rounds': rounds,
+        'tamper_rate': rate,
+        'tamper_rate_upper': binomial_upper_bound(failures, checked, confidence),
+        'confidence': confidence,
+        'sample_rate': f"{checked}/{n}",
+        'strata': [{'start': lo, 'stop': hi, 'checked': len(sampled[h]), 'errors': len(failed[h])}
+                   for h, (lo, hi) in enumerate(bounds)],
+    }
+
+
+# ── Appending ────────────────────────────────────────────────────────────────
+# Rewriting a 157k-block JSON array to add one block is O(n). The array's
+# closing bracket always sits right after the last block, so ChainWriter
+# appends by overwriting that bracket: ",\n<block>...\n]\n". Blocks from
+# many callers are queued, linked in arrival order on one writer thread,
+# and written in batches with a single fsync per batch (group commit).
+# max_delay trades latency for batch size; fsync=False trades durability
+# for speed. A crash mid-write leaves a torn tail with no closing bracket;
+# opening the file again truncates it back to the last complete block.
+
+TAIL_WINDOW = 1 << 16
+
+
+def find_tail(path: str, window: int = TAIL_WINDOW) -> Optional[tuple[int, int, dict]]:
+    """
+    (offset, length, block) of the last block, found by reading backwards
+    from the end of the file. None for an empty array, or when the file
+    does not end in a closing bracket (a torn or foreign file).
+    """
+    size = os.path.getsize(path)
+    with open(path, 'rb') as f:
+        while True:
+            start = max(size - window, 0)
+            f.seek(start)
+            data = f.read(size - start)
+            end = len(data.rstrip())
+            if not end or data[end - 1:end] != b']':
+                return None
+            block_end = len(data[:end - 1].rstrip())
+            if data[block_end - 1:block_end] != b'}':
+                return None  # an empty array, or not a chain
+            # Try each '{' that follows a ',' or '[' until one parses to the end
+            p = block_end
+            while (p := data.rfind(b'{', 0, p)) >= 0:
+                before = data[:p].rstrip()
+                if not before and start > 0:
+                    break  # the window cut off what precedes it
+                if before[-1:] in (b',', b'['):
+                    try:
+                        block = json.loads(data[p:block_end])
+                    except ValueError:
+                        continue
+                    if isinstance(block, dict):
+                        return start + p, block_end - p, block
+            if start == 0:
+                return None
+            window *= 4
+
+
+def _recover_tail(f, path: str) -> tuple[int, Optional[dict]]:
+    """
+    Truncate a torn chain file after its last complete block and close the
+    array again. Returns (offset where the next block goes, that last block).
+    Only a tail is ever cut: if a complete block follows the one that fails
+    to parse, the damage is inside the chain and this raises instead.
+    """
+    f.seek(0)
+    head = f.read(TAIL_WINDOW)
+    if not head.strip():
+        f.seek(0)
+        f.write(b'[')
+        tail, last = 1, None
+    else:
+        if head.lstrip()[:1] != b'[':
+            raise ValueError(f"{path}: not a JSON chain file; refusing to repair")
+        tail, last = head.index(b'[') + 1, None
+        try:
+            for offset, length, block in iter_chain_offsets(path):
+                tail, last = offset + length, block
+        except ChainFormatError as err:
+            if next_block_offset(path, err.offset) is not None:
+                raise ValueError(f"{path}: block at byte {err.offset} is corrupt but later "
+                                 f"blocks are intact; refusing to repair") from err
+            # Otherwise it is the torn tail itself
+    f.seek(tail)
+    f.write(b'\n]\n')
+    f.truncate()
+    f.flush()
+    os.fsync(f.fileno())
+    return tail, last
+
+
+class ChainWriter:
+    """
+    Append-only, group-committing writer for a JSON chain file.
+
+        with ChainWriter(path) as writer:
+            block = writer.append('alexa', 'alexa', 'journal entry')
+
+    submit() returns a Future for callers that should not block; it
+    resolves to the linked block once its batch is on disk.
+    """
+
+    def __init__(self, path: str = CHAIN_PATH, max_batch: int = 1024, max_delay: float = 0.005,
+                 fsync: bool = True, algorithm: str = 'sha256',
+                 clock: Callable[[], str] = utc_timestamp,
+                 on_commit: Optional[Callable[[list[tuple[int, int, dict]]], None]] = None):
+        self.path = path
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.fsync = fsync
+        self.clock = clock
+        self.on_commit = on_commit
+        if not os.path.exists(path):
+            open(path, 'wb').close()
+        self._file = open(path, 'r+b')
+        tail = find_tail(path) if os.path.getsize(path) else None
+        if tail is not None:
+            offset, length, self.tip = tail
+            self._tail = offset + length
+        else:
+            self._tail, self.tip = _recover_tail(self._file, path)
+        self.genesis = next(iter_chain(path), None) if self.tip is not None else None
+        self.algorithm = self.genesis.get('algorithm', 'sha256') if self.genesis else algorithm
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self.closed = False
+        self._thread = threading.Thread(target=self._run, name='chain-writer', daemon=True)
+        self._thread.start()
+
+    def submit(self, sender: str, recipient: str, data: str) -> Future:
+        future = Future()
+        with self._lock:
+            if self.closed:
+                raise ValueError("append to a closed ChainWriter")
+            self._queue.put((sender, recipient, data, future))
+        return future
+
+    def append(self, sender: str, recipient: str, data: str) -> dict:
+        return self.submit(sender, recipient, data).result()
+
+    def close(self):
+        with self._lock:
+            if self.closed:
+                return
+            self.closed = True
+            self._queue.put(None)
+        self._thread.join()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _run(self):
+        running = True
+        while running:
+            item = self._queue.get()
+            if item is None:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_delay
+            while len(batch) < self.max_batch:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            self._commit(batch)
+
+    def _commit(self, batch: list[tuple]):
+        try:
+            entries, parts = [], []
+            offset = self._tail
+            tip, genesis = self.tip, self.genesis
+            for sender, recipient, data, _ in batch:
+                if tip is None:
+                    block = make_block(0, '0' * 64, self.clock(), sender, recipient, data, self.algorithm)
+                    block['algorithm'] = self.algorithm
+                    genesis = block
+                else:
+                    block = make_block(tip['index'] + 1, tip['hash'], self.clock(),
+                                       sender, recipient, data, self.algorithm)
+                sep = b',\n' if tip is not None else b'\n'
+                encoded = json.dumps(block).encode()
+                parts += (sep, encoded)
+                entries.append((offset + len(sep), len(encoded), block))
+                offset += len(sep) + len(encoded)
+                tip = block
+            self._file.seek(self._tail)
+            self._file.write(b''.join(parts) + b'\n]\n')
+            self._file.truncate()
+            self._file.flush()
+            if self.fsync:
+                os.fsync(self._file.fileno())
+            self._tail, self.tip, self.genesis = offset, tip, genesis
+        except Exception as exc:
+            for *_, future in batch:
+                future.set_exception(exc)
+            return
+        tip_offset, tip_length, _ = entries[-1]
+        save_summary(self.path, summary_record(genesis, tip, tip_offset, tip_length, offset + 3))
+        # The batch is durable: callers are released before any hook runs
+        for (*_, future), (_, _, block) in zip(batch, entries):
+            future.set_result(block)
+        if self.on_commit is not None:
+            try:
+                self.on_commit(entries)
+            except Exception as exc:
+                # A failing hook must not stop the writer; the blocks are on disk
+                print(f"  ChainWriter on_commit hook failed: {exc!r}", file=sys.stderr, flush=True)
+
+
+# ── Stats Without Reading ────────────────────────────────────────────────────
+# chain_stats needs only the genesis block, the tip and the block count.
+# ChainWriter keeps those in a small summary file beside the chain
+# (<path>.summary.json), rewritten after every batch. The summary records
+# the chain file's size and where the tip sits; it is trusted only while
+# the file is still that size and the tip is still there, which costs a
+# stat and one short read. A legacy file, or one changed by hand, falls
+# back to reading the first block and finding the tip from the end of the
+# file; the count comes from the tip's index. Either way the body is never
+# parsed, so a dashboard can poll stats as often as it likes. A file that
+# does not end in a closing bracket is being appended to, or was torn by a
+# crash: its last summary still holds while that tip is in place, and
+# failing that the blocks are counted up to the last complete one.
+
+def summary_path(path: str) -> str:
+    return path + '.summary.json'
+
+
+def _slim(block: dict) -> dict:
+    return {k: block[k] for k in ('index', 'timestamp', 'hash') if k in block}
+
+
+def summary_record(genesis: dict, tip: dict, tip_offset: int, tip_length: int,
+                   size: int) -> dict:
+    """The summary of a chain file size bytes long whose tip is at tip_offset."""
+    return {
+        'size': size,
+        'total_blocks': tip['index'] + 1,
+        'genesis': _slim(genesis),
+        'tip': _slim(tip),
+        'tip_offset': tip_offset,
+        'tip_length': tip_length,
+    }
+
+
+def save_summary(path: str, record: dict):
+    """Write the summary beside the chain; a read-only directory is not an error."""
+    tmp = summary_path(path) + '.tmp'
+    try:
+        with open(tmp, 'w') as f:
+            json.dump(record, f)
+        os.replace(tmp, summary_path(path))
+    except OSError:
+        pass
+
+
+def load_summary(path: str = CHAIN_PATH, allow_growth: bool = False) -> Optional[dict]:
+    """
+    The saved summary, or None if it is missing or the chain has moved on.
+    With allow_growth, a file that has grown since is accepted as long as
+    the summarized tip is still in place: the stats as of the last commit.
+    """
+    try:
+        with open(summary_path(path)) as f:
+            record = json.load(f)
+        size = os.path.getsize(path)
+        if size != record['size'] and not (allow_growth and size > record['size']):
+            return None
+        tip = read_block_at(path, record['tip_offset'], record['tip_length'])
+    except (OSError, ValueError, KeyError):
+        return None
+    return record if tip.get('hash') == record['tip'].get('hash') else None
+
+
+def chain_file_stats(path: str = CHAIN_PATH) -> dict:
+    """
+    chain_stats for a chain file, from its summary or its two ends: the
+    cost does not grow with the chain. Never raises: a torn or half-written
+    file gives the stats up to its last complete block, and an unreadable
+    one gives {}.
+    """
+    if not os.path.exists(path):
+        return {}
+    record = load_summary(path)
+    if record is None:
+        try:
+            tail = find_tail(path)
+            if tail is not None and isinstance(tail[2].get('index'), int):
+                offset, length, tip = tail
+                genesis = next(iter_chain(path))
+                record = summary_record(genesis, tip, offset, length, os.path.getsize(path))
+                save_summary(path, record)
+        except (OSError, ValueError, StopIteration):
+            pass  # changed underneath us, or corrupt at the start
+    if record is None:
+        record = load_summary(path, allow_growth=True)
+    if record is None:
+        return chain_stats(_complete_blocks(path))  # empty, torn or unindexed
+    return dict(chain_stats([record['genesis'], record['tip']]),
+                total_blocks=record['total_blocks'])
+
+
+def _complete_blocks(path: str) -> Iterator[dict]:
+    """The blocks of a chain file up to the first one that does not parse."""
+    try:
+        yield from iter_chain(path)
+    except (OSError, ValueError):
+        return
+
+
+# ── Watching ─────────────────────────────────────────────────────────────────
+# A chain that grows forever cannot be reverified from scratch on every
+# change. ChainWatcher remembers the byte range and hash of the last block
+# it checked. Each poll is one stat of the chain file; only when the file
+# has grown does it read the new bytes, from the end of that block on,
+# and recompute the hash and link of each new block. A block half-written
+# by the appender is left for the next poll; one that can never parse is
+# reported and stepped over to the next complete block. If the remembered
+# block is no longer where it was, the file was rewritten underneath the
+# watcher: that is reported and the whole chain is checked again. With
+# state_path the position survives restarts.
+
+WATCH_INTERVAL = 2.0
+
+
+def print_alert(alert: dict):
+    """Default alert handler: one line on stderr."""
+    print(f"  ❌ block {alert['index']} at byte {alert['offset']:,}: {alert['reason']}",
+          file=sys.stderr, flush=True)
+
+
+class ChainWatcher:
+    """
+    Verifies a chain file incrementally as it grows.
+
+        watcher = ChainWatcher(path, on_alert=print_alert)
+        watcher.watch()            # or call watcher.poll() yourself
+
+    poll() returns the alerts it raised, each a dict with 'index',
+    'offset' and 'reason' ('hash', 'link', 'malformed' or 'rewritten').
+    A malformed block's index is its position, as it cannot be read; the
+    block after it is then checked against the last readable one.
+    """
+
+    def __init__(self, path: str = CHAIN_PATH,
+                 on_alert: Optional[Callable[[dict], None]] = None,
+                 state_path: Optional[str] = None):
+        self.path = path
+        self.on_alert = on_alert
+        self.state_path = state_path
+        self.reset()
+        if state_path is not None and os.path.exists(state_path):
+            with open(state_path) as f:
+                state = json.load(f)
+            self.algorithm = state['algorithm']
+            self.verified = state['verified']
+            self.tip_range = tuple(state['tip_range'])
+            self.end_offset = state.get('end_offset', sum(self.tip_range))
+            self.tip = {'hash': state['hash']}
+            self.size = state['size']
+
+    def reset(self):
+        self.algorithm = 'sha256'
+        self.verified = 0
+        self.tip = None          # the last block checked (only its hash is used)
+        self.tip_range = None    # its (offset, length) in the file
+        self.end_offset = 0
+        self.size = 0
+        self._malformed_at = None  # a bad block already reported
+
+    def _tip_intact(self) -> bool:
+        if self.tip is None:
+            return True
+        try:
+            return read_block_at(self.path, *self.tip_range).get('hash') == self.tip['hash']
+        except (OSError, ValueError):
+            return False
+
+    def _alert(self, alerts: list[dict], index, offset: int, reason: str):
+        alert = {'index': index, 'offset': offset, 'reason': reason}
+        alerts.append(alert)
+        if self.on_alert is not None:
+            self.on_alert(alert)
+
+    def poll(self) -> list[dict]:
+        """Verify whatever was appended since the last poll."""
+        try:
+            size = os.path.getsize(self.path)
+        except OSError:
+            return []
+        alerts = []
+        if size == self.size:
+            return alerts
+        if size < self.size or not self._tip_intact():
+            self._alert(alerts, self.verified - 1, self.tip_range[0] if self.tip_range else 0,
+                        'rewritten')
+            self.reset()
+        while True:
+            try:
+                for offset, length, block in iter_chain_offsets(self.path, self.end_offset):
+                    if self.tip is None:
+                        self.algorithm = block.get('algorithm', 'sha256')
+                    if not block_ok(block, None, self.algorithm):
+                        self._alert(alerts, block.get('index', self.verified), offset, 'hash')
+                    if self.tip is not None and block.get('previous_hash') != self.tip.get('hash'):
+                        self._alert(alerts, block.get('index', self.verified), offset, 'link')
+                    self.tip, self.tip_range = block, (offset, length)
+                    self.end_offset = offset + length
+                    self.verified += 1
+            except ChainFormatError as err:
+                resume = next_block_offset(self.path, err.offset)
+                if resume is None and err.truncated:
+                    break  # a block still being written; it is read again next poll
+                if err.offset != self._malformed_at:
+                    self._alert(alerts, self.verified, err.offset, 'malformed')
+                    self._malformed_at = err.offset
+                if resume is None:
+                    self.size = size  # nothing readable after it yet
+                    break
+                self.end_offset = resume
+                continue
+            self.size = size
+            break
+        if self.state_path is not None and self.tip is not None:
+            self.save()
+        return alerts
+
+    def save(self):
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({'algorithm': self.algorithm, 'verified': self.verified,
+                       'tip_range': self.tip_range, 'end_offset': self.end_offset,
+                       'hash': self.tip.get('hash'), 'size': self.size}, f)
+        os.replace(tmp, self.state_path)
+
+    def watch(self, interval: float = WATCH_INTERVAL, polls: Optional[int] = None):
+        """Poll every interval seconds, forever or for polls rounds."""
+        for n in itertools.count():
+            self.poll()
+            if polls is not None and n + 1 >= polls:
+                return
+            time.sleep(interval)
+
+
+def summarize_chain(chain: Iterable[dict], head_size: int = 6) -> dict:
+    """
+    Stats, the first head_size blocks, the tip and an integrity check,
+    gathered in a single pass when chain is a lazy iterator.
+    """
+    if isinstance(chain, Sequence):
+        return {
+            'stats': chain_stats(chain),
+            'head': chain[:head_size],
+            'last': chain[-1] if chain else None,
+            'integrity': verify_chain_integrity(chain),
+        }
+
+    head, last, total = [], None, 0
+
+    def tap(blocks):
+        nonlocal last, total
+        for block in blocks:
+            if len(head) < head_size:
+                head.append(block)
+            last = block
+            total += 1
+            yield block
+
+    integrity = verify_chain_integrity(tap(chain))
+    stats = dict(chain_stats([head[0], last]), total_blocks=total) if total else {}
+    return {'stats': stats, 'head': head, 'last': last, 'integrity': integrity}
+
+
+def print_chain_summary(chain: Iterable[dict]):
+    """Print a summary of the chain (a list, or a stream from iter_chain)."""
     print("=" * 60)
     print("THE ROADCHAIN — Personal Hash Chain")
     print("=" * 60)
 
-    if not chain:
+    summary = summarize_chain(chain)
+    stats = summary['stats']
+    if not stats:
         print("\n  No chain found at", CHAIN_PATH)
         print("  (The chain may be at a different path on this system)")
         demo_chain()
         return
 
-    stats = chain_stats(chain)
     print(f"\n  Blocks:      {stats['total_blocks']:,}")
     print(f"  First:       {stats['first_block']}")
     print(f"  Last:        {stats['last_block']}")
@@ -96,16 +998,16 @@ def print_chain_summary(chain: list[dict]):
     # Show first few blocks
     print(f"\n  {'Block':>8}  {'Sender':>12}  {'Recipient':>12}  {'Hash prefix'}")
     print("  " + "-" * 55)
-    for block in chain[:6]:
+    for block in summary['head']:
         idx = block.get('index', '?')
         sender = str(block.get('sender', ''))[:12]
         recipient = str(block.get('recipient', ''))[:12]
         h = str(block.get('hash', ''))[:16]
         print(f"  {idx:>8}  {sender:>12}  {recipient:>12}  {h}...")
 
-    if len(chain) > 6:
+    if stats['total_blocks'] > len(summary['head']):
         print(f"  {'...':>8}  {'...':>12}  {'...':>12}")
-        last = chain[-1]
+        last = summary['last']
         idx = last.get('index', '?')
         sender = str(last.get('sender', ''))[:12]
         recipient = str(last.get('recipient', ''))[:12]
@@ -113,13 +1015,14 @@ def print_chain_summary(chain: list[dict]):
         print(f"  {idx:>8}  {sender:>12}  {recipient:>12}  {h}...")
 
     # Verify
-    print(f"\n  Verifying integrity (sampling 100 blocks)...")
-    result = verify_chain_integrity(chain)
+    result = summary['integrity']
+    method = "sampling 100 blocks" if isinstance(chain, Sequence) else "every link, streamed"
+    print(f"\n  Verified integrity ({method}).")
     status = '✅ VALID' if result['valid'] else f"❌ {result['errors']} ERRORS"
-    print(f"  Checked {result['sample_rate']} blocks: {status}")
+    print(f"  Checked {result.get('sample_rate', '0/0')} blocks: {status}")
 
 
-def demo_chain():
+def demo_chain(algorithm: str = 'sha256') -> list[dict]:
     """Build a small demonstration chain to show the structure."""
     print("\n  Demonstrating chain structure with synthetic blocks:\n")
 
@@ -136,19 +1039,11 @@ def demo_chain():
 
     for i, (sender, recipient, data) in enumerate(events):
         ts = f"2026-02-21T{i:02d}:00:00Z"
-        content = f"{i}{prev_hash}{ts}{sender}{recipient}{data}"
-        block_hash = hashlib.sha256(content.encode()).hexdigest()
-        block = {
-            'index': i,
-            'timestamp': ts,
-            'sender': sender,
-            'recipient': recipient,
-            'data': data[:50],
-            'previous_hash': prev_hash,
-            'hash': block_hash,
-        }
+        block = make_block(i, prev_hash, ts, sender, recipient, data[:50], algorithm)
+        if i == 0:
+            block['algorithm'] = algorithm
         chain.append(block)
-        prev_hash = block_hash
+        prev_hash = block['hash']
 
     print(f"  {'Block':>6}  {'From':>10}  {'To':>12}  {'Data'}")
     print("  " + "-" * 60)
@@ -159,6 +1054,7 @@ def demo_chain():
     print(f"\n  Chain is append-only. Each block commits to all prior blocks.")
     print(f"  Altering any block breaks all subsequent hashes.")
     print(f"  This is how time works.")
+    return chain
 
 
 def anchoring_explained():
@@ -190,8 +1086,15 @@ def anchoring_explained():
 
 
 if __name__ == '__main__':
-    chain = load_chain()
-    print_chain_summary(chain)
+    if sys.argv[1:2] == ['--watch']:
+        path = sys.argv[2] if len(sys.argv) > 2 else CHAIN_PATH
+        print(f"Watching {path} (Ctrl-C to stop)")
+        try:
+            ChainWatcher(path, on_alert=print_alert).watch()
+        except KeyboardInterrupt:
+            pass
+        sys.exit(0)
+    print_chain_summary(iter_chain())
     anchoring_explained()
     print("=" * 60)
     print("PS-SHA-∞: Perpetual-State Secure Hash Algorithm")
@@ -0,0 +1,1020 @@
+"""
+roadchain_store.py — Where the Witness Is Kept
+
+On-disk forms of the RoadChain beyond the one big JSON array that
+roadchain.load_chain reads.
+
+The binary chain is a fixed-record file: every block gets one record of
+the same size holding its index and raw 32-byte digests inline, plus the
+offset of its variable fields (timestamp, sender, recipient, data, and any
+others) in a heap at the end of the file. The file is memory-mapped, so
+block N is found by arithmetic and reading it touches only its own pages.
+
+The archive is for cold storage: blocks are compressed in independent
+segments, and an index of where each segment starts lets a reader
+decompress only the segments it needs.
+
+The SQLite store is for analytics: the fields worth filtering on are
+indexed columns, so questions about the chain become SQL queries.
+
+A JSON chain file can also have two indexes beside it: a sidecar mapping
+senders, recipients and months to blocks, and a full-text index over the
+data each block carries.
+
+Author: BlackRoad OS, Inc.
+"""
+
+import bisect
+import itertools
+import json
+import lzma
+import mmap
+import os
+import re
+import shutil
+import sqlite3
+import struct
+import tempfile
+import zlib
+from array import array
+from collections import OrderedDict
+from collections.abc import Sequence
+from typing import Iterable, Iterator, Optional
+
+from roadchain import iter_chain, iter_chain_offsets, read_block_at
+
+
+# ── The Binary Chain ──────────────────────────────────────────────────────────
+# header: magic, version, record size, block count, heap start
+# record: index, heap offset, heap length, flags, previous_hash, hash
+# Hashes that are not 64 hex characters (or a missing index) cannot be
+# packed; the flags mark them and the original values live in the heap.
+
+BINARY_MAGIC = b'RCHN'
+BINARY_VERSION = 1
+_HEADER = struct.Struct('<4sHHQQ')
+_HEADER_SIZE = 32
+_RECORD = struct.Struct('<qQIB3x32s32s')
+_FIXED_FIELDS = ('index', 'previous_hash', 'hash')
+_RAW_INDEX, _RAW_PREV, _RAW_HASH = 1, 2, 4
+
+
+def _pack_digest(value) -> Optional[bytes]:
+    if isinstance(value, str) and len(value) == 64:
+        try:
+            raw = bytes.fromhex(value)
+        except ValueError:
+            return None
+        # Only lower-case hex round-trips exactly
+        return raw if raw.hex() == value else None
+    return None
+
+
+def _pack_block(block: dict, heap_offset: int) -> tuple[bytes, bytes]:
+    """One block as (fixed record, heap entry)."""
+    flags = 0
+    rest = {k: v for k, v in block.items() if k not in _FIXED_FIELDS}
+    index = block.get('index')
+    if not isinstance(index, int) or isinstance(index, bool):
+        flags |= _RAW_INDEX
+        if 'index' in block:
+            rest['index'] = index
+        index = -1
+    prev = _pack_digest(block.get('previous_hash'))
+    if prev is None:
+        flags |= _RAW_PREV
+        if 'previous_hash' in block:
+            rest['previous_hash'] = block['previous_hash']
+    digest = _pack_digest(block.get('hash'))
+    if digest is None:
+        flags |= _RAW_HASH
+        if 'hash' in block:
+            rest['hash'] = block['hash']
+    heap = json.dumps(rest, separators=(',', ':'), ensure_ascii=False).encode()
+    record = _RECORD.pack(index, heap_offset, len(heap), flags,
+                          prev or bytes(32), digest or bytes(32))
+    return record, heap
+
+
+def write_binary_chain(blocks: Iterable[dict], path: str) -> int:
+    """
+    Write blocks to a binary chain file, streaming: records go straight to
+    the file and the heap is spooled to a temporary file, then appended.
+    Returns the number of blocks written.
+    """
+    count = heap_size = 0
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as out, tempfile.TemporaryFile() as heap:
+        out.write(bytes(_HEADER_SIZE))
+        for block in blocks:
+            record, entry = _pack_block(block, heap_size)
+            out.write(record)
+            heap.write(entry)
+            heap_size += len(entry)
+            count += 1
+        heap.seek(0)
+        shutil.copyfileobj(heap, out)
+        out.seek(0)
+        out.write(_HEADER.pack(BINARY_MAGIC, BINARY_VERSION, _RECORD.size, count,
+                               _HEADER_SIZE + count * _RECORD.size))
+    os.replace(tmp, path)
+    return count
+
+
+class BinaryChain(Sequence):
+    """
+    A memory-mapped binary chain. chain[i], slicing, len(), genesis and tip
+    all work by record offset, without reading the rest of the file.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self._count, self._heap_start = _HEADER.unpack_from(self._mm)
+        if magic != BINARY_MAGIC or version != BINARY_VERSION or record_size != _RECORD.size:
+            self.close()
+            raise ValueError(f"{path}: not a version {BINARY_VERSION} binary chain")
+
+    def close(self):
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _record(self, i: int) -> tuple:
+        return _RECORD.unpack_from(self._mm, _HEADER_SIZE + i * _RECORD.size)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('block index out of range')
+        index, offset, length, flags, prev, digest = self._record(i)
+        start = self._heap_start + offset
+        rest = json.loads(self._mm[start:start + length])
+        block = {} if flags & _RAW_INDEX else {'index': index}
+        block.update(rest)
+        if not flags & _RAW_PREV:
+            block['previous_hash'] = prev.hex()
+        if not flags & _RAW_HASH:
+            block['hash'] = digest.hex()
+        return block
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(self._count):
+            yield self[i]
+
+    def raw_hashes(self, i: int) -> tuple[bytes, bytes]:
+        """(previous_hash, hash) of block i as raw digests, heap untouched."""
+        _, _, _, _, prev, digest = self._record(i)
+        return prev, digest
+
+    @property
+    def genesis(self) -> dict:
+        return self[0]
+
+    @property
+    def tip(self) -> dict:
+        return self[-1]
+
+
+def json_to_binary(json_path: str, binary_path: str) -> int:
+    """Convert a JSON chain to the binary format, streaming."""
+    return write_binary_chain(iter_chain(json_path), binary_path)
+
+
+def binary_to_json(binary_path: str, json_path: str) -> int:
+    """Convert a binary chain back to a JSON array, streaming."""
+    with BinaryChain(binary_path) as chain, open(json_path, 'w') as out:
+        out.write('[')
+        for i, block in enumerate(chain):
+            out.write(',\n' if i else '\n')
+            out.write(json.dumps(block))
+        out.write('\n]\n')
+        return len(chain)
+
+
+# ── Compressed Archive ───────────────────────────────────────────────────────
+# One gzip stream over the whole chain compresses well but must be read
+# from the start to reach any block. The archive compresses runs of
+# segment_size blocks (as JSON lines) independently, with zlib or lzma,
+# and ends with an index: one (first block, file offset, compressed size)
+# entry per segment. Reading block N is a binary search in the index and
+# one segment decompressed; the last few segments read are kept, so
+# nearby and sequential reads do not decompress anything twice.
+# header: magic, version, codec, segment size, block count, index offset
+
+ARCHIVE_MAGIC = b'RCHZ'
+ARCHIVE_VERSION = 1
+ARCHIVE_CODECS = {
+    'zlib': (1, lambda data: zlib.compress(data, 9), zlib.decompress),
+    'lzma': (2, lzma.compress, lzma.decompress),
+}
+_ARCHIVE_HEADER = struct.Struct('<4sHHIQQ')
+_SEGMENT = struct.Struct('<QQI')
+SEGMENT_SIZE = 1024
+
+
+def write_archive(blocks: Iterable[dict], path: str, segment_size: int = SEGMENT_SIZE,
+                  codec: str = 'zlib') -> int:
+    """
+    Write blocks to a compressed archive, streaming: only one segment is
+    held in memory at a time. Returns the number of blocks written.
+    """
+    if codec not in ARCHIVE_CODECS:
+        raise ValueError(f"unknown codec: {codec} (choose from {', '.join(ARCHIVE_CODECS)})")
+    codec_id, compress, _ = ARCHIVE_CODECS[codec]
+    tmp = path + '.tmp'
+    count = 0
+    segments, lines = [], []
+    with open(tmp, 'wb') as out:
+        out.write(bytes(_ARCHIVE_HEADER.size))
+
+        def flush():
+            data = compress('\n'.join(lines).encode())
+            segments.append(_SEGMENT.pack(count - len(lines), out.tell(), len(data)))
+            out.write(data)
+            lines.clear()
+
+        for block in blocks:
+            lines.append(json.dumps(block, separators=(',', ':'), ensure_ascii=False))
+            count += 1
+            if len(lines) == segment_size:
+                flush()
+        if lines:
+            flush()
+        index_offset = out.tell()
+        out.write(b''.join(segments))
+        out.seek(0)
+        out.write(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC, ARCHIVE_VERSION, codec_id,
+                                       segment_size, count, index_offset))
+    os.replace(tmp, path)
+    return count
+
+
+class ArchiveChain(Sequence):
+    """
+    A compressed archive opened for reading. chain[i], slicing, len(),
+    genesis and tip decompress only the segments holding those blocks.
+    """
+
+    def __init__(self, path: str, cached_segments: int = 4):
+        self.path = path
+        self.cached_segments = cached_segments
+        self.segments_read = 0
+        self._cache = OrderedDict()
+        self._file = open(path, 'rb')
+        header = self._file.read(_ARCHIVE_HEADER.size)
+        try:
+            magic, version, codec_id, self.segment_size, self._count, index_offset = \
+                _ARCHIVE_HEADER.unpack(header)
+        except struct.error:
+            magic = version = None
+        codecs = {cid: (name, decompress) for name, (cid, _, decompress) in ARCHIVE_CODECS.items()}
+        if magic != ARCHIVE_MAGIC or version != ARCHIVE_VERSION or codec_id not in codecs:
+            self.close()
+            raise ValueError(f"{path}: not a version {ARCHIVE_VERSION} chain archive")
+        self.codec, self._decompress = codecs[codec_id]
+        self._file.seek(index_offset)
+        index = self._file.read()
+        self._segments = [_SEGMENT.unpack_from(index, i)
+                          for i in range(0, len(index), _SEGMENT.size)]
+        self._firsts = [first for first, _, _ in self._segments]
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _segment(self, k: int) -> list[bytes]:
+        """Segment k as its undecoded JSON lines; only requested blocks are parsed."""
+        if k in self._cache:
+            self._cache.move_to_end(k)
+            return self._cache[k]
+        _, offset, length = self._segments[k]
+        self._file.seek(offset)
+        lines = self._decompress(self._file.read(length)).split(b'\n')
+        self.segments_read += 1
+        self._cache[k] = lines
+        if len(self._cache) > self.cached_segments:
+            self._cache.popitem(last=False)
+        return lines
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(self._count))]
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError('block index out of range')
+        k = bisect.bisect_right(self._firsts, i) - 1
+        return json.loads(self._segment(k)[i - self._firsts[k]])
+
+    def __iter__(self) -> Iterator[dict]:
+        for k in range(len(self._segments)):
+            for line in self._segment(k):
+                yield json.loads(line)
+
+    @property
+    def genesis(self) -> dict:
+        return self[0]
+
+    @property
+    def tip(self) -> dict:
+        return self[-1]
+
+
+def json_to_archive(json_path: str, archive_path: str, segment_size: int = SEGMENT_SIZE,
+                    codec: str = 'zlib') -> int:
+    """Archive a JSON chain, streaming."""
+    return write_archive(iter_chain(json_path), archive_path, segment_size, codec)
+
+
+# ── SQLite Store ─────────────────────────────────────────────────────────────
+# The whole block is kept as JSON in body, so nothing is lost, and the
+# fields worth filtering on are copied into indexed columns. Blocks are
+# keyed by their position in the chain (pos), which is what chain[i]
+# means; "index" is whatever the block itself says. SqliteChain is a
+# Sequence, so chain_stats, print_chain_summary and the verifiers take it
+# as they take the list load_chain returns, while sender, recipient,
+# timestamp and hash lookups go through the indexes instead of a scan.
+# The database runs in WAL mode: readers are not blocked by an import or
+# append in progress.
+
+SQLITE_COLUMNS = ('index', 'hash', 'previous_hash', 'sender', 'recipient', 'timestamp')
+SQLITE_BATCH_SIZE = 10_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS blocks (
+    pos INTEGER PRIMARY KEY,
+    "index" INTEGER,
+    hash TEXT,
+    previous_hash TEXT,
+    sender TEXT,
+    recipient TEXT,
+    timestamp TEXT,
+    body TEXT NOT NULL
+);
+"""
+_INDEXES = ''.join(f'CREATE INDEX IF NOT EXISTS blocks_{c} ON blocks ("{c}");\n'
+                   for c in SQLITE_COLUMNS)
+_DROP_INDEXES = ''.join(f'DROP INDEX IF EXISTS blocks_{c};\n' for c in SQLITE_COLUMNS)
+
+
+_INSERT = 'INSERT INTO blocks (pos, {}, body) VALUES ({})'.format(
+    ', '.join(f'"{c}"' for c in SQLITE_COLUMNS), ', '.join('?' * (len(SQLITE_COLUMNS) + 2)))
+
+
+def _connect(path: str) -> sqlite3.Connection:
+    conn = sqlite3.connect(path)
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.executescript(_SCHEMA + _INDEXES)
+    return conn
+
+
+def _column_value(value):
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    return json.dumps(value)  # SQLite cannot bind lists or dicts
+
+
+def _row(pos: int, block: dict) -> tuple:
+    return (pos, *(_column_value(block.get(c)) for c in SQLITE_COLUMNS),
+            json.dumps(block, separators=(',', ':'), ensure_ascii=False))
+
+
+def write_sqlite_chain(blocks: Iterable[dict], path: str, append: bool = False,
+                       batch_size: int = SQLITE_BATCH_SIZE) -> int:
+    """
+    Load blocks into a SQLite chain. Without append the existing blocks
+    are replaced in a single transaction: readers see the old chain until
+    the new one is complete, and a failed import leaves the old one in
+    place. The indexes are dropped for the load and built once at the end
+    of that transaction rather than maintained row by row. With append,
+    each batch_size blocks is its own transaction, so a failure keeps the
+    batches already added. Returns how many blocks were written.
+    """
+    conn = _connect(path)
+    conn.isolation_level = None  # transactions are managed explicitly below
+    try:
+        if not append:
+            conn.execute('BEGIN')
+            conn.execute('DELETE FROM blocks')
+            for statement in _DROP_INDEXES.splitlines():
+                conn.execute(statement)
+        start = conn.execute('SELECT COALESCE(MAX(pos) + 1, 0) FROM blocks').fetchone()[0]
+        blocks = iter(blocks)
+        written = 0
+        while batch := list(itertools.islice(blocks, batch_size)):
+            if append:
+                conn.execute('BEGIN')
+            conn.executemany(_INSERT, [_row(pos, block) for pos, block in enumerate(batch, start + written)])
+            if append:
+                conn.execute('COMMIT')
+            written += len(batch)
+        if not append:
+            for statement in _INDEXES.splitlines():
+                conn.execute(statement)
+            conn.execute('COMMIT')
+        return written
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute('ROLLBACK')
+        raise
+    finally:
+        conn.close()
+
+
+class SqliteChain(Sequence):
+    """
+    A chain in a SQLite database. chain[i], slicing, len(), iteration,
+    genesis and tip read only the rows they need; query() filters on the
+    indexed columns.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.connection = _connect(path)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self) -> int:
+        return self.connection.execute('SELECT COALESCE(MAX(pos) + 1, 0) FROM blocks').fetchone()[0]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            start, stop, step = i.indices(len(self))
+            if step != 1:
+                return [self[j] for j in range(start, stop, step)]
+            rows = self.connection.execute(
+                'SELECT body FROM blocks WHERE pos >= ? AND pos < ? ORDER BY pos', (start, stop))
+            return [json.loads(body) for body, in rows]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('block index out of range')
+        body, = self.connection.execute('SELECT body FROM blocks WHERE pos = ?', (i,)).fetchone()
+        return json.loads(body)
+
+    def __iter__(self) -> Iterator[dict]:
+        for body, in self.connection.execute('SELECT body FROM blocks ORDER BY pos'):
+            yield json.loads(body)
+
+    @property
+    def genesis(self) -> dict:
+        return self[0]
+
+    @property
+    def tip(self) -> dict:
+        return self[-1]
+
+    def append(self, block: dict):
+        with self.connection:
+            self.connection.execute(_INSERT, _row(len(self), block))
+
+    def query(self, since: Optional[str] = None, until: Optional[str] = None,
+              **criteria) -> list[dict]:
+        """
+        Blocks matching every given column, in chain order, optionally
+        within [since, until) by timestamp: query(sender='satoshi', since='2009-02').
+        """
+        clauses, params = [], []
+        for column, value in criteria.items():
+            if column not in SQLITE_COLUMNS:
+                raise ValueError(f"unknown indexed column: {column}")
+            clauses.append(f'"{column}" = ?')
+            params.append(value)
+        if since is not None:
+            clauses.append('timestamp >= ?')
+            params.append(since)
+        if until is not None:
+            clauses.append('timestamp < ?')
+            params.append(until)
+        where = ' WHERE ' + ' AND '.join(clauses) if clauses else ''
+        rows = self.connection.execute(f'SELECT body FROM blocks{where} ORDER BY pos', params)
+        return [json.loads(body) for body, in rows]
+
+
+def json_to_sqlite(json_path: str, db_path: str, batch_size: int = SQLITE_BATCH_SIZE) -> int:
+    """Import a JSON chain into SQLite, streaming, replacing what was there."""
+    return write_sqlite_chain(iter_chain(json_path), db_path, batch_size=batch_size)
+
+
+# ── Sidecar Indexes ──────────────────────────────────────────────────────────
+# Finding every block from one sender, to one recipient, or in one month
+# should not mean a full scan. A sidecar index next to the chain file maps
+# each sender, each recipient and each timestamp bucket (by default the
+# month, 'YYYY-MM') to the byte ranges of the matching blocks. It is built
+# in one streaming pass and caught up incrementally: it remembers where the
+# last indexed block ends and parses only what was appended after it, or
+# is fed by ChainWriter's on_commit hook. Queries intersect the posting
+# lists and read just the matching blocks.
+# On disk it is a snapshot (.idx.json) plus a log (.idx.log) of the blocks
+# indexed since, one JSON line each, so saving after an append writes only
+# the new lines. Once the log outgrows the snapshot the two are merged into
+# a new snapshot; that O(index) rewrite happens at most once per doubling,
+# so saves cost O(1) amortized per block. The log names the snapshot
+# generation it extends, so a log left behind by an interrupted merge is
+# ignored rather than replayed twice.
+
+def _tip_intact(chain_path: str, tip: Optional[list]) -> bool:
+    """True if the block an index saw last is still where it was."""
+    if tip is None:
+        return True
+    offset, length, tip_hash = tip
+    if os.path.getsize(chain_path) < offset + length:
+        return False
+    try:
+        return read_block_at(chain_path, offset, length).get('hash') == tip_hash
+    except ValueError:
+        return False
+
+
+class SidecarIndex:
+    """Secondary indexes over a JSON chain file, stored beside it."""
+
+    FIELDS = ('sender', 'recipient', 'bucket')
+    LOG_MIN_ENTRIES = 1024  # never merge a log shorter than this
+
+    def __init__(self, chain_path: str, bucket_chars: int = 7):
+        self.chain_path = chain_path
+        self.bucket_chars = bucket_chars
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        # field -> key -> flat [offset, length, offset, length, ...]
+        self.postings = {field: {} for field in self.FIELDS}
+        self.count = 0
+        self.end_offset = 0
+        self.tip = None  # [offset, length, hash] of the last indexed block
+        self._pending = []  # log entries not yet saved
+        self._snapshot_count = self._log_count = 0
+        self._merge = True  # the saved files no longer extend to this state
+
+    @property
+    def path(self) -> str:
+        return self.chain_path + '.idx.json'
+
+    @property
+    def log_path(self) -> str:
+        return self.chain_path + '.idx.log'
+
+    def keys_for(self, block: dict) -> dict:
+        return {
+            'sender': str(block.get('sender', '')),
+            'recipient': str(block.get('recipient', '')),
+            'bucket': str(block.get('timestamp', ''))[:self.bucket_chars],
+        }
+
+    def _apply(self, entry: list):
+        """entry: [offset, length, hash, key per field]."""
+        offset, length, block_hash, *keys = entry
+        for field, key in zip(self.FIELDS, keys):
+            self.postings[field].setdefault(key, []).extend((offset, length))
+        self.count += 1
+        self.end_offset = offset + length
+        self.tip = [offset, length, block_hash]
+
+    def add(self, block: dict, offset: int, length: int):
+        """Index one block found at [offset, offset + length) in the chain file."""
+        keys = self.keys_for(block)
+        entry = [offset, length, block.get('hash'), *(keys[field] for field in self.FIELDS)]
+        self._apply(entry)
+        self._pending.append(entry)
+
+    def add_entries(self, entries: Iterable[tuple[int, int, dict]]):
+        """For ChainWriter(path, on_commit=index.add_entries); save() persists them."""
+        for offset, length, block in entries:
+            self.add(block, offset, length)
+
+    def refresh(self) -> int:
+        """Index blocks appended since the last refresh. Returns how many."""
+        if not os.path.exists(self.chain_path):
+            self.reset()
+            return 0
+        if not _tip_intact(self.chain_path, self.tip):
+            # The chain was rewritten underneath us: start over
+            self.reset()
+        added = 0
+        for offset, length, block in iter_chain_offsets(self.chain_path, self.end_offset):
+            self.add(block, offset, length)
+            added += 1
+        return added
+
+    def save(self):
+        """Append new entries to the log, or merge everything into a new snapshot."""
+        if not self._merge and self._log_count + len(self._pending) <= max(
+                self._snapshot_count, self.LOG_MIN_ENTRIES):
+            if self._pending:
+                with open(self.log_path, 'a') as f:
+                    f.writelines(json.dumps(entry, ensure_ascii=False) + '\n'
+                                 for entry in self._pending)
+                self._log_count += len(self._pending)
+                self._pending = []
+            return
+        self.generation += 1
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump({
+                'bucket_chars': self.bucket_chars,
+                'generation': self.generation,
+                'count': self.count,
+                'end_offset': self.end_offset,
+                'tip': self.tip,
+                'postings': self.postings,
+            }, f, separators=(',', ':'))
+        os.replace(tmp, self.path)
+        with open(self.log_path, 'w') as f:
+            f.write(json.dumps({'generation': self.generation}) + '\n')
+        self._snapshot_count, self._log_count = self.count, 0
+        self._pending = []
+        self._merge = False
+
+    def load(self) -> bool:
+        """Read the saved snapshot and replay its log. False if there is none usable."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path) as f:
+            saved = json.load(f)
+        if saved['bucket_chars'] != self.bucket_chars:
+            return False
+        self.reset()
+        self.generation = saved.get('generation', 0)
+        self.postings = saved['postings']
+        self.count = self._snapshot_count = saved['count']
+        self.end_offset = saved['end_offset']
+        self.tip = saved['tip']
+        self._merge = False
+        if not os.path.exists(self.log_path):
+            self._merge = True  # an older index without a log: start one
+            return True
+        with open(self.log_path) as f:
+            lines = f.read().split('\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = {}
+        if header.get('generation') != self.generation:
+            self._merge = True  # a log from before the last merge
+            return True
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                self._merge = True  # torn by a crash mid-save; merge it away
+                break
+            self._apply(entry)
+            self._log_count += 1
+        return True
+
+    @classmethod
+    def open(cls, chain_path: str, bucket_chars: int = 7) -> 'SidecarIndex':
+        """Load the sidecar (if any), catch it up with the chain, and save."""
+        index = cls(chain_path, bucket_chars)
+        index.load()
+        if index.refresh() or index._merge:
+            index.save()
+        return index
+
+    def lookup(self, **criteria) -> list[tuple[int, int]]:
+        """
+        Byte ranges of the blocks matching every given field, in file order:
+        lookup(sender='satoshi', bucket='2009-02').
+        """
+        lists = []
+        for field, key in criteria.items():
+            if field not in self.postings:
+                raise ValueError(f"unknown index field: {field}")
+            flat = self.postings[field].get(key, [])
+            lists.append(dict(zip(flat[::2], flat[1::2])))
+        if not lists:
+            return []
+        lists.sort(key=len)
+        hits = [(offset, length) for offset, length in lists[0].items()
+                if all(offset in other for other in lists[1:])]
+        return sorted(hits)
+
+    def query(self, **criteria) -> list[dict]:
+        """The matching blocks themselves, read straight from their offsets."""
+        return [read_block_at(self.chain_path, offset, length)
+                for offset, length in self.lookup(**criteria)]
+
+
+# ── Full-Text Index ──────────────────────────────────────────────────────────
+# Finding journal entries by keyword should not mean substring-scanning
+# every block. TextIndex maps each token of each block's data (lower-cased
+# runs of word characters) to the positions of the blocks containing it.
+# A posting list only grows at the end, so it is kept as the gaps between
+# successive positions, LEB128 varint-encoded: a word used in every block
+# costs one byte per block. Like SidecarIndex it is built in one streaming
+# pass and caught up from where it stopped, and it can also be fed by
+# ChainWriter's on_commit hook as blocks are appended. The byte range of
+# every block is kept too, so matches are read straight from the chain.
+# It is saved the way SidecarIndex is: a binary snapshot (.fts) plus a log
+# (.fts.log) with one JSON line per block indexed since, its byte range,
+# hash and tokens; the two are merged only once the log outgrows the
+# snapshot, so saving after an append costs O(1) amortized per block.
+# .fts: magic, version, metadata JSON, block ranges, then per token:
+# token, last position, posting bytes
+
+TEXT_MAGIC = b'RCFT'
+TEXT_VERSION = 1
+_TOKEN = re.compile(r'\w+')
+
+
+def tokenize(text: str) -> set[str]:
+    return set(_TOKEN.findall(text.lower()))
+
+
+def _put_varint(out: bytearray, n: int):
+    while n >= 0x80:
+        out.append(n & 0x7F | 0x80)
+        n >>= 7
+    out.append(n)
+
+
+def _read_varint(data: bytes, pos: int) -> tuple[int, int]:
+    n = shift = 0
+    while True:
+        byte = data[pos]
+        pos += 1
+        n |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return n, pos
+        shift += 7
+
+
+def decode_postings(data: bytes) -> list[int]:
+    """The block positions of a gap-encoded posting list."""
+    positions, pos, last = [], 0, 0
+    while pos < len(data):
+        gap, pos = _read_varint(data, pos)
+        last += gap
+        positions.append(last)
+    return positions
+
+
+class TextIndex:
+    """
+    Full-text index over one field (by default data) of a JSON chain file,
+    stored beside it. search('bitcoin genesis OR satoshi') means
+    (bitcoin AND genesis) OR satoshi, and returns block positions in
+    chain order.
+    """
+
+    LOG_MIN_ENTRIES = 1024  # never merge a log shorter than this
+
+    def __init__(self, chain_path: str, field: str = 'data'):
+        self.chain_path = chain_path
+        self.field = field
+        self.generation = 0
+        self.reset()
+
+    def reset(self):
+        self.postings = {}   # token -> bytearray of varint gaps
+        self._last = {}      # token -> position of its last posting
+        self.ranges = array('Q')  # offset, length of every block, in order
+        self.end_offset = 0
+        self.tip = None  # [offset, length, hash] of the last indexed block
+        self._pending = []  # log entries not yet saved
+        self._snapshot_count = self._log_count = 0
+        self._merge = True  # the saved files no longer extend to this state
+
+    @property
+    def path(self) -> str:
+        return self.chain_path + '.fts'
+
+    @property
+    def log_path(self) -> str:
+        return self.chain_path + '.fts.log'
+
+    @property
+    def count(self) -> int:
+        return len(self.ranges) // 2
+
+    def _apply(self, entry: list):
+        """entry: [offset, length, hash, tokens]."""
+        offset, length, block_hash, tokens = entry
+        position = self.count
+        for token in tokens:
+            last = self._last.get(token)
+            if last is None:
+                self.postings[token] = bytearray()
+                last = 0
+            _put_varint(self.postings[token], position - last)
+            self._last[token] = position
+        self.ranges.extend((offset, length))
+        self.end_offset = offset + length
+        self.tip = [offset, length, block_hash]
+
+    def add(self, block: dict, offset: int, length: int):
+        """Index the next block, found at [offset, offset + length)."""
+        entry = [offset, length, block.get('hash'),
+                 sorted(tokenize(str(block.get(self.field, ''))))]
+        self._apply(entry)
+        self._pending.append(entry)
+
+    def add_entries(self, entries: Iterable[tuple[int, int, dict]]):
+        """For ChainWriter(path, on_commit=index.add_entries); save() persists them."""
+        for offset, length, block in entries:
+            self.add(block, offset, length)
+
+    def refresh(self) -> int:
+        """Index blocks appended since the last refresh. Returns how many."""
+        if not os.path.exists(self.chain_path):
+            self.reset()
+            return 0
+        if not _tip_intact(self.chain_path, self.tip):
+            self.reset()
+        added = 0
+        for offset, length, block in iter_chain_offsets(self.chain_path, self.end_offset):
+            self.add(block, offset, length)
+            added += 1
+        return added
+
+    def save(self):
+        """Append new entries to the log, or merge everything into a new snapshot."""
+        if not self._merge and self._log_count + len(self._pending) <= max(
+                self._snapshot_count, self.LOG_MIN_ENTRIES):
+            if self._pending:
+                with open(self.log_path, 'a', encoding='utf-8') as f:
+                    f.writelines(json.dumps(entry, ensure_ascii=False) + '\n'
+                                 for entry in self._pending)
+                self._log_count += len(self._pending)
+                self._pending = []
+            return
+        self.generation += 1
+        out = bytearray(TEXT_MAGIC + struct.pack('<H', TEXT_VERSION))
+        meta = json.dumps({'field': self.field, 'generation': self.generation,
+                           'count': self.count, 'end_offset': self.end_offset,
+                           'tip': self.tip}).encode()
+        _put_varint(out, len(meta))
+        out += meta
+        out += self.ranges.tobytes()
+        for token, data in self.postings.items():
+            encoded = token.encode()
+            _put_varint(out, len(encoded))
+            out += encoded
+            _put_varint(out, self._last[token])
+            _put_varint(out, len(data))
+            out += data
+        tmp = self.path + '.tmp'
+        with open(tmp, 'wb') as f:
+            f.write(out)
+        os.replace(tmp, self.path)
+        with open(self.log_path, 'w', encoding='utf-8') as f:
+            f.write(json.dumps({'generation': self.generation}) + '\n')
+        self._snapshot_count, self._log_count = self.count, 0
+        self._pending = []
+        self._merge = False
+
+    def load(self) -> bool:
+        """Read the snapshot and replay its log. False if there is none for this field."""
+        if not os.path.exists(self.path):
+            return False
+        with open(self.path, 'rb') as f:
+            data = f.read()
+        if data[:4] != TEXT_MAGIC or struct.unpack_from('<H', data, 4)[0] != TEXT_VERSION:
+            return False
+        size, pos = _read_varint(data, 6)
+        meta = json.loads(data[pos:pos + size])
+        if meta['field'] != self.field:
+            return False
+        self.reset()
+        self.generation = meta.get('generation', 0)
+        self.end_offset, self.tip = meta['end_offset'], meta['tip']
+        self._snapshot_count = meta['count']
+        pos += size
+        end = pos + meta['count'] * 2 * self.ranges.itemsize
+        self.ranges.frombytes(data[pos:end])
+        pos = end
+        while pos < len(data):
+            size, pos = _read_varint(data, pos)
+            token = data[pos:pos + size].decode()
+            self._last[token], pos = _read_varint(data, pos + size)
+            size, pos = _read_varint(data, pos)
+            self.postings[token] = bytearray(data[pos:pos + size])
+            pos += size
+        self._merge = False
+        if not os.path.exists(self.log_path):
+            self._merge = True  # an older index without a log: start one
+            return True
+        with open(self.log_path, encoding='utf-8') as f:
+            lines = f.read().split('\n')
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            header = {}
+        if header.get('generation') != self.generation:
+            self._merge = True  # a log from before the last merge
+            return True
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                self._merge = True  # torn by a crash mid-save; merge it away
+                break
+            self._apply(entry)
+            self._log_count += 1
+        return True
+
+    @classmethod
+    def open(cls, chain_path: str, field: str = 'data') -> 'TextIndex':
+        """Load the index (if any), catch it up with the chain, and save."""
+        index = cls(chain_path, field)
+        index.load()
+        if index.refresh() or index._merge:
+            index.save()
+        return index
+
+    def search(self, query: str) -> list[int]:
+        """
+        Positions of the blocks matching query, in chain order. Words are
+        ANDed; OR (in capitals) separates alternatives and binds loosest.
+        """
+        hits = set()
+        for clause in re.split(r'\s+OR\s+', query.strip()):
+            tokens = set().union(*(tokenize(w) for w in clause.split() if w != 'AND'))
+            if not tokens:
+                continue
+            lists = sorted((self.postings.get(t, b'') for t in tokens), key=len)
+            matched = set(decode_postings(lists[0]))
+            for data in lists[1:]:
+                if not matched:
+                    break
+                matched.intersection_update(decode_postings(data))
+            hits |= matched
+        return sorted(hits)
+
+    def blocks(self, positions: Iterable[int]) -> list[dict]:
+        """The blocks at the given positions, read from their byte ranges."""
+        return [read_block_at(self.chain_path, self.ranges[2 * i], self.ranges[2 * i + 1])
+                for i in positions]
+
+
+if __name__ == '__main__':
+    from roadchain import demo_chain
+
+    print("=" * 60)
+    print("WHERE THE WITNESS IS KEPT — RoadChain Storage Formats")
+    print("=" * 60)
+    chain = demo_chain()
+    with tempfile.TemporaryDirectory() as workdir:
+        path = os.path.join(workdir, 'chain.rchn')
+        write_binary_chain(chain, path)
+        with BinaryChain(path) as stored:
+            print(f"\n  Binary chain: {len(stored)} blocks, {os.path.getsize(path):,} bytes")
+            print(f"  Record size:  {_RECORD.size} bytes — block N is at {_HEADER_SIZE} + N × {_RECORD.size}")
+            print(f"  Block 1 data: {stored[1]['data'][:40]}...")
+            print(f"  Round trip:   {'✅ identical' if stored[:] == chain else '❌ differs'}")
+        raw = len(json.dumps(chain).encode())
+        for codec in ARCHIVE_CODECS:
+            path = os.path.join(workdir, f'chain.{codec}.rchz')
+            write_archive(chain, path, segment_size=2, codec=codec)
+            with ArchiveChain(path) as archived:
+                same = list(archived) == chain
+                print(f"  {codec:>4} archive: {os.path.getsize(path):,} bytes "
+                      f"(JSON {raw:,}) — {'✅ identical' if same else '❌ differs'}")
+        path = os.path.join(workdir, 'chain.sqlite')
+        write_sqlite_chain(chain, path)
+        with SqliteChain(path) as stored:
+            hits = stored.query(sender='satoshi')
+            print(f"  SQLite store: {len(stored)} blocks; sender='satoshi' → blocks "
+                  f"{', '.join(str(b['index']) for b in hits)}")
+        path = os.path.join(workdir, 'chain.json')
+        with open(path, 'w') as f:
+            json.dump(chain, f)
+        text = TextIndex.open(path)
+        print(f"  Text index:   'bitcoin' → blocks {text.search('bitcoin')}, "
+              f"'genesis OR confirmed' → {text.search('genesis OR confirmed')}")
@@ -50,6 +50,153 @@ class TestHashChain:
         for i in range(1, len(chain)):
             assert chain[i]['previous_hash'] == chain[i - 1]['hash']
 
+    def test_mine_blocks_matches_mine_block(self):
+        """Batch mining must produce exactly the blocks mine_block would."""
+        from hashchain import frozen_clock, mine_block, mine_blocks
+        clock = frozen_clock("2009-01-03T18:15:05Z")
+        batch = mine_blocks(["a", "b", "c"], 'ab' * 32, start=7, clock=clock)
+        prev = 'ab' * 32
+        for i, data in enumerate(["a", "b", "c"], start=7):
+            expected = mine_block(i, prev, data, clock)
+            assert batch[i - 7] == expected
+            prev = expected['hash']
+
+    def test_build_chain_reproducible_with_clock(self):
+        """A deterministic clock must make chains reproducible."""
+        from hashchain import build_chain, frozen_clock, verify_chain
+        clock = frozen_clock("2009-01-03T18:15:05Z")
+        chain = build_chain(["x", "y"], clock=clock)
+        assert chain == build_chain(["x", "y"], clock=clock)
+        assert chain[1]['timestamp'] == "2009-01-03T18:15:05Z"
+        assert verify_chain(chain) is True
+
+    def test_proof_of_work_block(self):
+        """A PoW block must meet its target and verify in a chain."""
+        from hashchain import build_chain, first_invalid_block, meets_target, mine_block
+        chain = build_chain(["a"])
+        block = mine_block(2, chain[-1]['hash'], "mined", difficulty_bits=8)
+        assert meets_target(block['hash'], 8)
+        assert block['hash'].startswith('00')
+        chain.append(block)
+        assert first_invalid_block(chain) is None
+        block['difficulty_bits'] = 4
+        assert first_invalid_block(chain) == 2
+
+    def test_proof_of_work_rejects_impossible_difficulty(self):
+        """Difficulties outside 1..255 must be refused instead of hanging."""
+        import pytest
+        from hashchain import mine_block, proof_of_work
+        for bits in (0, 256, 300, -1):
+            with pytest.raises(ValueError):
+                proof_of_work(b'prefix:', bits)
+        with pytest.raises(ValueError):
+            mine_block(1, '0' * 64, "mined", difficulty_bits=256)
+
+    def test_proof_of_work_parallel(self):
+        """The process-pool search must return a valid nonce and a hash count."""
+        import hashlib
+        from hashchain import meets_target, proof_of_work
+        nonce, hashes, seconds = proof_of_work(b'prefix:', 10, workers=2, chunk_size=256)
+        assert hashes >= 1 and seconds > 0
+        assert meets_target(hashlib.sha256(b'prefix:%d' % nonce).hexdigest(), 10)
+
+    def test_block_store_ancestry(self):
+        """Skip pointers must answer ancestry queries along a long chain."""
+        from hashchain import BlockStore, build_chain
+        chain = build_chain([f"event{i}" for i in range(100)])
+        store = BlockStore()
+        assert store.add_chain(chain)
+        tip = chain[-1]['hash']
+        assert len(store.skips[tip]) == 7  # 1, 2, 4, ..., 64 back
+        for height in (0, 1, 37, 64, 100):
+            assert store.ancestor(tip, height) == chain[height]['hash']
+        assert store.is_ancestor(chain[42]['hash'], tip)
+        assert not store.is_ancestor(tip, chain[42]['hash'])
+
+    def test_block_store_fork_detection(self):
+        """Two diverging branches must report their fork point."""
+        from hashchain import BlockStore, build_chain, mine_blocks
+        chain = build_chain([f"event{i}" for i in range(20)])
+        branch = mine_blocks([f"alt{i}" for i in range(15)], chain[9]['hash'], start=10)
+        store = BlockStore()
+        assert store.add_chain(chain) and store.add_chain(branch)
+        a, b = chain[-1]['hash'], branch[-1]['hash']
+        assert store.forks() == [chain[9]['hash']]
+        assert sorted(store.tips()) == sorted([a, b])
+        assert store.common_ancestor(a, b) == chain[9]['hash']
+        assert store.common_ancestor(a, chain[5]['hash']) == chain[5]['hash']
+        assert not store.is_ancestor(chain[12]['hash'], b)
+
+    def test_block_store_rejects_orphans(self):
+        """Blocks with an unknown parent or a bad hash must be rejected."""
+        from hashchain import BlockStore, build_chain
+        chain = build_chain(["a", "b"])
+        store = BlockStore()
+        assert not store.add(chain[2])
+        chain[1]['data'] = 'tampered'
+        assert store.add(chain[0]) and not store.add(chain[1])
+
+    def test_avalanche_reference(self):
+        """Flip rate should sit near one half, with every sample counted."""
+        from hashchain import avalanche_stats
+        stats = avalanche_stats(n_messages=20, msg_len=4, engine='reference')
+        assert stats['samples'] == 20 * 32
+        assert sum(stats['histogram']) == stats['samples']
+        assert 0.45 < stats['mean_flip_rate'] < 0.55
+        assert len(stats['bias_matrix']) == 32 and len(stats['bias_matrix'][0]) == 256
+
+    def test_avalanche_rejects_bad_arguments(self):
+        """No messages, or messages longer than a digest, must be refused."""
+        import pytest
+        from hashchain import avalanche_stats
+        for kwargs in ({'n_messages': 0}, {'msg_len': 0}, {'msg_len': 33}):
+            with pytest.raises(ValueError):
+                avalanche_stats(engine='reference', **kwargs)
+
+    def test_avalanche_numpy_matches_reference(self):
+        """The NumPy engine, sharded across workers, must match the reference."""
+        import pytest
+        pytest.importorskip("numpy")
+        from hashchain import avalanche_stats
+        ref = avalanche_stats(n_messages=12, msg_len=2, seed=7, engine='reference')
+        fast = avalanche_stats(n_messages=12, msg_len=2, seed=7, workers=2, engine='numpy')
+        for key in ('samples', 'histogram', 'bias_matrix', 'mean_flip_rate'):
+            assert fast[key] == ref[key]
+
+    def test_avalanche_sharding_is_stable(self):
+        """Splitting the work across shards must not change the statistics."""
+        from hashchain import avalanche_stats
+        one = avalanche_stats(n_messages=6, msg_len=2, seed=3, engine='reference')
+        many = avalanche_stats(n_messages=6, msg_len=2, seed=3, workers=3, engine='reference')
+        assert one == many
+
+    def test_chain_records_digest_algorithm(self):
+        """Genesis carries the algorithm tag and verification dispatches on it."""
+        from hashchain import DIGEST_ALGORITHMS, build_chain, first_invalid_block, verify_chain
+        for name in DIGEST_ALGORITHMS:
+            chain = build_chain(["a", "b", "c"], algorithm=name)
+            assert chain[0]['algorithm'] == name
+            assert all(len(b['hash']) == 64 for b in chain)
+            assert verify_chain(chain) is True
+            assert first_invalid_block(chain, workers=2, executor='thread') is None
+        chain = build_chain(["a", "b", "c"], algorithm='blake2b')
+        chain[0]['algorithm'] = 'sha256'
+        assert verify_chain(chain) is False
+
+    def test_legacy_chain_defaults_to_sha256(self):
+        """A genesis block without a tag must still verify as SHA-256."""
+        from hashchain import build_chain, verify_chain
+        chain = build_chain(["a", "b"])
+        del chain[0]['algorithm']
+        assert verify_chain(chain) is True
+
+    def test_benchmark_digests(self):
+        """The benchmark must report both rates for every algorithm."""
+        from hashchain import DIGEST_ALGORITHMS, benchmark_digests
+        results = benchmark_digests(payload_mb=1, n_blocks=50)
+        assert set(results) == set(DIGEST_ALGORITHMS)
+        assert all(r['mb_per_s'] > 0 and r['blocks_per_s'] > 0 for r in results.values())
+
     def test_verify_valid_chain(self):
         """An unmodified chain must pass verification."""
         from hashchain import build_chain, verify_chain
@@ -63,6 +210,257 @@ class TestHashChain:
         chain[1]['data'] = 'tampered'
         assert verify_chain(chain) is False
 
+    def test_unknown_algorithm_tag_is_invalid(self):
+        """An edited algorithm tag on genesis must fail at index 0, not raise."""
+        import pytest
+        from hashchain import (build_chain, build_checkpoints, chain_algorithm, first_invalid_block,
+                               locate_tamper, verify_chain, verify_chain_incremental)
+        chain = build_chain([f"event{i}" for i in range(20)])
+        checkpoints = build_checkpoints(chain, epoch_size=8)
+        for tag in ('md5', 'SHA256', None):
+            chain[0]['algorithm'] = tag
+            with pytest.raises(ValueError):
+                chain_algorithm(chain[0])
+            assert verify_chain(chain) is False
+            assert first_invalid_block(chain, workers=2, executor='thread') == 0
+            assert locate_tamper(chain, checkpoints) == {'index': 0, 'field': 'algorithm', 'epoch': 0}
+        assert verify_chain_incremental(chain, '/nonexistent/watermark.json') == 0
+
+    def test_first_invalid_block_parallel(self):
+        """Parallel verification must report the same first failing index."""
+        from hashchain import build_chain, first_invalid_block, verify_chain
+        chain = build_chain([f"event{i}" for i in range(40)])
+        assert first_invalid_block(chain, workers=4) is None
+        assert verify_chain(chain, workers=4) is True
+        chain[23]['data'] = 'tampered'
+        chain[31]['data'] = 'tampered'
+        assert first_invalid_block(chain) == 23
+        assert first_invalid_block(chain, workers=4) == 23
+        assert first_invalid_block(chain, workers=4, executor='thread') == 23
+
+    def test_first_invalid_block_range_boundary(self):
+        """A broken link at a range boundary must still be caught."""
+        from hashchain import build_chain, first_invalid_block, mine_block
+        chain = build_chain([f"event{i}" for i in range(40)])
+        # Re-mine block 11 on a foreign parent: its own hash is valid, its link is not
+        chain[11] = mine_block(11, 'f' * 64, chain[11]['data'])
+        assert first_invalid_block(chain, workers=4) == 11
+
+    def test_stream_chain_round_trip(self, tmp_path):
+        """A streamed JSONL chain must read back identical and verify lazily."""
+        import json
+        from hashchain import first_invalid_block, iter_chain, stream_chain, verify_chain
+        path = tmp_path / "chain.jsonl"
+        count = stream_chain((f"event{i}" for i in range(10)), str(path))
+        assert count == 11
+        blocks = list(iter_chain(str(path)))
+        assert [b['index'] for b in blocks] == list(range(11))
+        assert blocks[0]['data'] == 'genesis'
+        assert verify_chain(iter_chain(str(path))) is True
+
+        lines = path.read_text().splitlines()
+        block = json.loads(lines[4])
+        block['data'] = 'tampered'
+        lines[4] = json.dumps(block)
+        path.write_text("\n".join(lines) + "\n")
+        assert first_invalid_block(iter_chain(str(path))) == 4
+        assert first_invalid_block(iter_chain(str(path)), workers=4) == 4
+        assert verify_chain(iter_chain(str(path)), workers=4) is False
+
+    def test_merkle_inclusion_proof(self):
+        """Every block should prove inclusion against the checkpoint root."""
+        from hashchain import build_chain, build_checkpoints, inclusion_proof, verify_inclusion
+        chain = build_chain([f"event{i}" for i in range(20)])
+        checkpoints = build_checkpoints(chain, epoch_size=4)
+        assert len(checkpoints['epoch_roots']) == 6
+        for i in range(len(chain)):
+            proof = inclusion_proof(chain, i, checkpoints)
+            assert len(proof['block_path']) <= 2
+            assert verify_inclusion(chain[i], proof, checkpoints['root'])
+
+    def test_merkle_inclusion_rejects_tampering(self):
+        """A tampered block or a foreign root must not verify."""
+        from hashchain import build_chain, build_checkpoints, inclusion_proof, verify_inclusion
+        chain = build_chain([f"event{i}" for i in range(9)])
+        checkpoints = build_checkpoints(chain, epoch_size=4)
+        proof = inclusion_proof(chain, 5, checkpoints)
+        assert not verify_inclusion(chain[5], proof, '0' * 64)
+        chain[5]['data'] = 'tampered'
+        assert not verify_inclusion(chain[5], proof, checkpoints['root'])
+
+    def test_checkpoints_saved_next_to_chain(self, tmp_path):
+        """Checkpoints should round-trip through the sidecar file."""
+        from hashchain import build_chain, build_checkpoints, load_checkpoints, save_checkpoints
+        chain_path = str(tmp_path / "chain.jsonl")
+        checkpoints = build_checkpoints(build_chain(["a", "b"]))
+        assert save_checkpoints(checkpoints, chain_path) == chain_path + '.merkle.json'
+        assert load_checkpoints(chain_path) == checkpoints
+
+    def test_locate_tamper_rewritten_history(self):
+        """A re-mined history must be bisected to its block and field."""
+        from hashchain import (build_chain, build_checkpoints, first_invalid_block, locate_tamper,
+                               mine_blocks, verify_chain)
+        chain = build_chain([f"event{i}" for i in range(100)])
+        checkpoints = build_checkpoints(chain, epoch_size=8)
+        assert locate_tamper(chain, checkpoints) is None
+
+        # Rewrite block 43 and re-link everything after it: the chain is valid again
+        forged = chain[:43] + mine_blocks([f"forged{i}" for i in range(58)], chain[42]['hash'], start=43)
+        assert verify_chain(forged) is True
+        assert locate_tamper(forged, checkpoints) == {'index': 43, 'field': 'checkpoint', 'epoch': 5}
+
+        # A sloppy rewrite that left block 45's content edited but not re-hashed
+        forged[45] = dict(forged[45], data='edited')
+        assert locate_tamper(forged, checkpoints) == {'index': 43, 'field': 'checkpoint', 'epoch': 5}
+
+        # A lone in-place edit leaves every tip intact; the fallback scan reports it
+        edited = list(chain)
+        edited[43] = dict(chain[43], data='edited')
+        assert locate_tamper(edited, checkpoints) == {'index': 43, 'field': 'hash', 'epoch': 5}
+        assert first_invalid_block(edited) == 43
+        unchecked = {'index': None, 'field': 'unchecked', 'epoch': None}
+        assert locate_tamper(edited, checkpoints, scan=False) == unchecked
+        assert locate_tamper(chain, checkpoints, scan=False) == unchecked
+
+    def test_locate_tamper_reports_the_first_fault(self):
+        """An in-place edit before a rewrite must be found first, as verify_chain would."""
+        from hashchain import build_chain, build_checkpoints, first_invalid_block, locate_tamper, mine_blocks
+        chain = build_chain([f"event{i}" for i in range(99)])
+        checkpoints = build_checkpoints(chain, epoch_size=10)
+        forged = chain[:35] + mine_blocks([f"forged{i}" for i in range(65)], chain[34]['hash'], start=35)
+        assert locate_tamper(forged, checkpoints) == {'index': 35, 'field': 'checkpoint', 'epoch': 3}
+        forged[12] = dict(forged[12], data='edited')
+        assert first_invalid_block(forged) == 12
+        assert locate_tamper(forged, checkpoints) == {'index': 12, 'field': 'hash', 'epoch': 1}
+        assert locate_tamper(forged, checkpoints, scan=False)['index'] == 35
+
+    def test_locate_tamper_truncated(self):
+        """A chain shorter than its checkpoints must be reported as missing blocks."""
+        from hashchain import build_chain, build_checkpoints, locate_tamper
+        chain = build_chain([f"event{i}" for i in range(20)])
+        checkpoints = build_checkpoints(chain, epoch_size=8)
+        assert locate_tamper(chain[:18], checkpoints) == {'index': 18, 'field': 'missing', 'epoch': 2}
+
+    def test_witness_batch_receipts(self):
+        """One block must witness every record in the batch."""
+        from hashchain import build_chain, verify_chain, verify_receipt, witness_batch
+        chain = build_chain(["a"])
+        records = [f"record {i}" for i in range(13)]
+        receipts = witness_batch(chain, records)
+        assert len(chain) == 3 and len(receipts) == 13
+        assert verify_chain(chain) is True
+        for record, receipt in zip(records, receipts):
+            assert len(receipt['path']) <= 4
+            assert verify_receipt(record, receipt, chain[-1])
+        assert not verify_receipt("record 99", receipts[0], chain[-1])
+        assert not verify_receipt(records[0], receipts[0], chain[1])
+
+    def test_witness_batch_rejects_empty(self):
+        """An empty batch must not grow the chain."""
+        import pytest
+        from hashchain import build_chain, witness_batch
+        chain = build_chain(["a"])
+        with pytest.raises(ValueError):
+            witness_batch(chain, [])
+        assert len(chain) == 2
+
+    def test_hash_file_tree_root(self, tmp_path):
+        """The file root must match a tree over per-chunk SHA-256 digests."""
+        from hashchain import hash_file, merkle_root
+        payload = bytes(range(256)) * 41  # 10,496 bytes: three 4 KiB chunks
+        path = tmp_path / "artifact.bin"
+        path.write_bytes(payload)
+        tree = hash_file(str(path), chunk_size=4096, workers=3)
+        chunks = [payload[i:i + 4096] for i in range(0, len(payload), 4096)]
+        assert tree['chunks'] == 3 and tree['size'] == len(payload)
+        assert tree['root'] == merkle_root([hashlib.sha256(c).digest() for c in chunks]).hex()
+        assert hash_file(str(path), chunk_size=4096, workers=1) == tree
+
+    def test_witness_file(self, tmp_path):
+        """A witnessed file's block stores only its root and size."""
+        from hashchain import build_chain, hash_file, verify_chain, witness_file
+        path = tmp_path / "artifact.bin"
+        path.write_bytes(b"payload" * 1000)
+        chain = build_chain(["a"])
+        block = witness_file(chain, str(path), chunk_size=1024)
+        assert block['data'] == f"file:{hash_file(str(path), 1024)['root']}:7000"
+        assert verify_chain(chain) is True
+        empty = tmp_path / "empty.bin"
+        empty.write_bytes(b"")
+        assert hash_file(str(empty))['size'] == 0
+
+    def test_verify_chain_incremental(self, tmp_path):
+        """Only the new suffix is checked, anchored to the saved watermark."""
+        from hashchain import build_chain, load_watermark, mine_block, verify_chain_incremental
+        mark = str(tmp_path / "watermark.json")
+        chain = build_chain(["a", "b", "c"])
+        assert verify_chain_incremental(chain, mark) is None
+        assert load_watermark(mark) == {'index': 3, 'hash': chain[3]['hash']}
+
+        chain.append(mine_block(4, chain[-1]['hash'], "d"))
+        chain[1]['data'] = 'tampered'  # behind the watermark: not rechecked
+        assert verify_chain_incremental(chain, mark) is None
+        assert load_watermark(mark)['index'] == 4
+
+        chain.append(mine_block(5, 'f' * 64, "e"))
+        assert verify_chain_incremental(chain, mark) == 5
+        assert load_watermark(mark)['index'] == 4
+
+    def test_verify_chain_incremental_rewritten_tip(self, tmp_path):
+        """A rewritten watermark block must be reported."""
+        from hashchain import build_chain, verify_chain_incremental
+        mark = str(tmp_path / "watermark.json")
+        assert verify_chain_incremental(build_chain(["a", "b"]), mark) is None
+        assert verify_chain_incremental(build_chain(["x", "y"]), mark) == 2
+
+    def test_compact_block_matches_dict_block(self):
+        """A compact block must hash and serialize exactly like its dict form."""
+        from hashchain import Block, block_hash, build_compact_chain, verify_chain
+        chain = build_compact_chain(["a", "b", "c"])
+        dicts = [b.to_dict() for b in chain]
+        assert verify_chain(dicts) is True
+        assert dicts[0]['previous_hash'] == '0' * 64
+        for block, d in zip(chain, dicts):
+            assert len(block.hash) == 32
+            assert block.hash.hex() == block_hash(d) == d['hash']
+            assert Block.from_dict(d) == block
+            assert Block.from_bytes(block.to_bytes()) == block
+
+    def test_build_compact_chain_with_clock(self):
+        """With a fixed clock the compact chain must match mine_blocks block for block."""
+        from hashchain import build_compact_chain, frozen_clock, mine_blocks
+        clock = frozen_clock("2009-01-03T18:15:05Z")
+        chain = build_compact_chain(["a", "b", "c"], clock=clock)
+        assert chain == build_compact_chain(["a", "b", "c"], clock=clock)
+        expected = mine_blocks(["a", "b", "c"], chain[0].hash.hex(), start=1, clock=clock)
+        assert [b.to_dict() for b in chain[1:]] == expected
+        assert (chain[2].index, chain[2].timestamp, chain[2].data) == (2, "2009-01-03T18:15:05Z", "b")
+
+    def test_compact_chain_tamper_detection(self):
+        """Compact verification must find the first tampered block."""
+        from hashchain import Block, build_compact_chain, first_invalid_compact
+        chain = build_compact_chain(["a", "b", "c", "d"])
+        assert first_invalid_compact(chain) is None
+        d = chain[2].to_dict()
+        d['data'] = 'tampered'
+        chain[2] = Block.from_dict(d)
+        assert chain[2].recompute() != chain[2].hash
+        assert first_invalid_compact(chain) == 2
+        relinked = build_compact_chain(["a", "b", "c", "d"])
+        relinked[3] = Block.create(3, bytes(32), b'ts', b'd')
+        assert first_invalid_compact(relinked) == 3
+
+    def test_compact_block_refuses_what_it_cannot_verify(self):
+        """Other digest algorithms and mined blocks must be refused, not mangled."""
+        import pytest
+        from hashchain import Block, build_chain, first_invalid_compact, mine_block
+        chain = build_chain(["a", "b"])
+        assert first_invalid_compact([Block.from_dict(b) for b in chain]) is None
+        with pytest.raises(ValueError):
+            Block.from_dict(build_chain(["a"], algorithm='blake2b')[0])
+        with pytest.raises(ValueError):
+            Block.from_dict(mine_block(1, chain[0]['hash'], "mined", difficulty_bits=4))
+
 
 # ── godel.py tests ──────────────────────────────────────────────────────────
 
@@ -115,6 +513,31 @@ class TestGodel:
         assert valid is False
         assert fail_idx == 0
 
+    def test_ps_hash_chain_verify_incremental(self, tmp_path):
+        """Incremental verify should only check blocks past the watermark."""
+        from godel import PSHashChain
+        mark = str(tmp_path / "ps.watermark.json")
+        chain = PSHashChain()
+        chain.append("first", actor="test")
+        chain.append("second", actor="test")
+        assert chain.verify_incremental(mark) == (True, None)
+        chain.append("third", actor="test")
+        chain.chain[2]["content"] = "tampered"
+        assert chain.verify_incremental(mark) == (False, 2)
+        chain.chain[1]["hash"] = "0" * 64
+        assert chain.verify_incremental(mark) == (False, 1)
+
+    def test_ps_hash_chain_algorithm(self):
+        """The first block records the algorithm used for the whole chain."""
+        from godel import PSHashChain
+        chain = PSHashChain(algorithm="blake2s")
+        chain.append("first", actor="test")
+        chain.append("second", actor="test")
+        assert chain.chain[0]["algorithm"] == "blake2s"
+        assert chain.verify() == (True, None)
+        chain.chain[0]["algorithm"] = "sha256"
+        assert chain.verify() == (False, 0)
+
     def test_incompleteness_gallery(self):
         """Gallery should contain key theorems."""
         from godel import INCOMPLETENESS_GALLERY
@@ -123,6 +546,749 @@ class TestGodel:
         assert len(INCOMPLETENESS_GALLERY) >= 5
 
 
+# ── roadchain.py tests ──────────────────────────────────────────────────────
+
+class TestRoadChain:
+    def test_demo_chain_algorithm(self):
+        """The demo chain should tag genesis and link every block."""
+        from hashchain import DIGEST_ALGORITHMS
+        from roadchain import block_hash, demo_chain
+        chain = demo_chain(algorithm='blake2b')
+        assert chain[0]['algorithm'] == 'blake2b'
+        block = chain[3]
+        content = (f"{block['index']}{block['previous_hash']}{block['timestamp']}"
+                   f"{block['sender']}{block['recipient']}{block['data']}")
+        assert block['hash'] == DIGEST_ALGORITHMS['blake2b'](content.encode()).hexdigest()
+        for i in range(len(chain)):
+            assert block_hash(chain[i], 'blake2b') == chain[i]['hash']
+        for i in range(1, len(chain)):
+            assert chain[i]['previous_hash'] == chain[i - 1]['hash']
+
+
+    def test_iter_chain_streams_blocks(self, tmp_path):
+        """The streaming parser must match json.load for any chunking."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import iter_chain, iter_chain_batches, load_chain
+        chain = synthetic_roadchain(50)
+        chain[7]['data'] = 'brackets ] and braces } inside "quotes"'
+        for indent in (None, 2):
+            path = tmp_path / f"chain-{indent}.json"
+            path.write_text(json.dumps(chain, indent=indent))
+            assert list(iter_chain(str(path), chunk_size=17)) == load_chain(str(path))
+        batches = list(iter_chain_batches(str(path), batch_size=20))
+        assert [len(b) for b in batches] == [20, 20, 10]
+        empty = tmp_path / "empty.json"
+        empty.write_text(" [ ] ")
+        assert list(iter_chain(str(empty))) == []
+        assert list(iter_chain(str(tmp_path / "missing.json"))) == []
+
+    def test_iter_chain_rejects_truncated_file(self, tmp_path):
+        """A file cut off mid-block must raise, not silently stop."""
+        import json
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import iter_chain
+        path = tmp_path / "chain.json"
+        path.write_text(json.dumps(synthetic_roadchain(5))[:-40])
+        with pytest.raises(ValueError):
+            list(iter_chain(str(path), chunk_size=64))
+
+    def test_iter_chain_stops_at_malformed_block(self, tmp_path):
+        """A malformed block must fail at once, at its absolute file offset."""
+        import json
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import ChainFormatError, iter_chain_offsets
+        chain = synthetic_roadchain(2000)
+        text = json.dumps(chain, indent=2)
+        bad = text.index('"index": 10,')
+        path = tmp_path / "chain.json"
+        path.write_text(text[:bad] + '"index": 10 garbage' + text[bad + 12:])
+        seen = []
+        with pytest.raises(ChainFormatError) as caught:
+            for offset, _, block in iter_chain_offsets(str(path), chunk_size=256):
+                seen.append(offset)
+        assert len(seen) == 10 and not caught.value.truncated
+        assert caught.value.offset == text.rindex('{', 0, bad)
+        assert caught.value.error_offset == bad + len('"index": 10 ')
+        assert str(caught.value.error_offset) in str(caught.value)
+
+        torn = tmp_path / "torn.json"
+        torn.write_text(text[:bad + 30])
+        with pytest.raises(ChainFormatError) as caught:
+            list(iter_chain_offsets(str(torn), chunk_size=256))
+        assert caught.value.truncated and caught.value.offset == text.rindex('{', 0, bad)
+
+    def test_lazy_stats_and_integrity_match_list(self, tmp_path):
+        """Stats and link checks over a stream must agree with the list versions."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import chain_stats, iter_chain, summarize_chain, verify_chain_integrity
+        chain = synthetic_roadchain(30)
+        path = tmp_path / "chain.json"
+        path.write_text(json.dumps(chain))
+        assert chain_stats(iter_chain(str(path))) == chain_stats(chain)
+        assert verify_chain_integrity(iter_chain(str(path)))['checked'] == 29
+        summary = summarize_chain(iter_chain(str(path)))
+        assert summary['stats'] == chain_stats(chain)
+        assert summary['head'] == chain[:6] and summary['last'] == chain[-1]
+        chain[12]['previous_hash'] = '0' * 64
+        path.write_text(json.dumps(chain))
+        assert verify_chain_integrity(iter_chain(str(path)))['errors'] == 1
+
+
+    def test_verify_chain_full(self):
+        """Every hash and link is checked, and every failing index returned."""
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import verify_chain_full
+        chain = synthetic_roadchain(60)
+        seen = []
+        result = verify_chain_full(chain, workers=2, shard_size=16,
+                                   progress=lambda done, total, rate: seen.append((done, total)))
+        assert result['valid'] and result['checked'] == 60 and result['errors'] == []
+        assert sorted(seen)[-1] == (60, 60) and len(seen) == 4
+
+        chain[0]['data'] = 'tampered genesis'
+        chain[16]['data'] = 'tampered'          # first block of a shard
+        chain[40]['previous_hash'] = '0' * 64   # broken link
+        del chain[51]['hash']
+        for workers in (1, 3):
+            result = verify_chain_full(chain, workers=workers, shard_size=16)
+            assert result['errors'] == [0, 16, 40, 51, 52]
+            assert not result['valid']
+
+
+    def test_sampled_verification_bounds_tamper_rate(self):
+        """A clean sample must bound the rate; a seed must repeat the draw."""
+        import math
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import binomial_upper_bound, sample_size_for, verify_chain_sampled
+        chain = synthetic_roadchain(2000)
+        result = verify_chain_sampled(chain, sample_size=200, strata=8, seed=7)
+        assert result['valid'] and result['checked'] == 200 and result['rounds'] == 1
+        assert all(s['checked'] == 25 for s in result['strata'])
+        assert math.isclose(result['tamper_rate_upper'], 1 - 0.05 ** (1 / 200))
+        assert verify_chain_sampled(chain, seed=7) == verify_chain_sampled(chain, seed=7)
+        assert sample_size_for(0.01) == 299
+        assert binomial_upper_bound(0, 299) < 0.01 < binomial_upper_bound(1, 299)
+        assert math.isclose(binomial_upper_bound(3, 300), 0.02564, abs_tol=1e-4)
+
+    def test_sampled_verification_maps_tampered_region(self):
+        """Edited contents must be caught and the damaged run mapped densely."""
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import verify_chain_integrity, verify_chain_sampled
+        chain = synthetic_roadchain(5000)
+        for i in range(3000, 3050):
+            chain[i]['data'] = 'rewritten'
+        assert verify_chain_integrity(chain, sample_size=500)['valid']  # links alone miss it
+        result = verify_chain_sampled(chain, sample_size=500, seed=3)
+        assert not result['valid'] and result['rounds'] > 1
+        assert set(result['errors']) <= set(range(3000, 3050))
+        assert len(result['errors']) > 25
+        assert result['tamper_rate_upper'] > 50 / 5000
+
+    def test_find_tail(self, tmp_path):
+        """The last block must be found from the end, braces in data or not."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import find_tail, read_block_at
+        chain = synthetic_roadchain(50)
+        chain[-1]['data'] = 'nested {"a": {"b": 1}}, [trailing]'
+        chain[-1]['meta'] = {'tags': ['x'], 'inner': {'deep': True}}
+        path = str(tmp_path / "chain.json")
+        with open(path, 'w') as f:
+            json.dump(chain, f, indent=2)
+        offset, length, block = find_tail(path, window=64)
+        assert block == chain[-1] == read_block_at(path, offset, length)
+        with open(path, 'w') as f:
+            f.write("[ ]")
+        assert find_tail(path) is None
+
+    def test_chain_writer_group_commit(self, tmp_path):
+        """Concurrent appends must be linked in order and verify in full."""
+        import threading
+        from roadchain import ChainWriter, load_chain, verify_chain_full
+        path = str(tmp_path / "chain.json")
+        committed = []
+        with ChainWriter(path, max_delay=0.01, algorithm='blake2b',
+                         on_commit=committed.extend) as writer:
+            genesis = writer.append('0', 'genesis', 'genesis')
+            futures = []
+
+            def worker(n):
+                futures.extend(writer.submit(f"s{n}", "r", f"entry {n}.{i}") for i in range(25))
+
+            threads = [threading.Thread(target=worker, args=(n,)) for n in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+            blocks = [f.result() for f in futures]
+        chain = load_chain(path)
+        assert len(chain) == 101 and chain[0] == genesis
+        assert chain[0]['algorithm'] == 'blake2b'
+        assert sorted(b['index'] for b in blocks) == list(range(1, 101))
+        assert verify_chain_full(chain, workers=1)['valid']
+        assert [block for _, _, block in committed] == chain
+
+        with ChainWriter(path) as writer:
+            assert writer.append('alexa', 'alexa', 'reopened')['index'] == 101
+        assert verify_chain_full(load_chain(path), workers=1)['valid']
+
+    def test_chain_writer_survives_failing_hook(self, tmp_path, capsys):
+        """A raising on_commit hook must not hang callers or stop the writer."""
+        import pytest
+        from roadchain import ChainWriter, load_chain
+
+        def hook(entries):
+            raise RuntimeError("index is down")
+
+        path = str(tmp_path / "chain.json")
+        writer = ChainWriter(path, fsync=False, on_commit=hook)
+        assert writer.submit('a', 'b', 'one').result(timeout=5)['index'] == 0
+        assert writer.submit('a', 'b', 'two').result(timeout=5)['index'] == 1
+        assert writer._thread.is_alive()
+        writer.close()
+        writer.close()
+        assert 'index is down' in capsys.readouterr().err
+        assert len(load_chain(path)) == 2
+        with pytest.raises(ValueError):
+            writer.submit('a', 'b', 'after close')
+
+    def test_chain_writer_recovers_torn_tail(self, tmp_path):
+        """A crash mid-batch must be cut back to the last complete block."""
+        from roadchain import ChainWriter, load_chain
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(5):
+                writer.append('a', 'b', f"entry {i}")
+        with open(path, 'rb+') as f:
+            data = f.read()
+            f.seek(0)
+            f.write(data[:-3] + b',\n{"index": 5, "timest')
+            f.truncate()
+        with ChainWriter(path) as writer:
+            assert writer.tip['index'] == 4
+            assert writer.append('a', 'b', 'after crash')['index'] == 5
+        chain = load_chain(path)
+        assert [b['index'] for b in chain] == list(range(6))
+        assert chain[5]['previous_hash'] == chain[4]['hash']
+
+    def test_chain_writer_refuses_mid_file_corruption(self, tmp_path):
+        """Corruption with intact blocks after it must not be cut away as a tail."""
+        import json
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import ChainWriter, next_block_offset
+        text = json.dumps(synthetic_roadchain(2000), indent=2)
+        bad = text.index('"index": 10,')
+        damaged = (text[:bad] + '"index": 10 garbage' + text[bad + 12:-40]).encode()
+        path = tmp_path / "chain.json"
+        path.write_bytes(damaged)
+        with pytest.raises(ValueError):
+            ChainWriter(str(path))
+        assert path.read_bytes() == damaged
+        assert next_block_offset(str(path), bad) == damaged.index(b'},', bad) + 1
+
+        # Zeros left in a torn tail are still only a tail
+        path.write_bytes(text[:bad].encode() + b'\0' * 100)
+        with ChainWriter(str(path)) as writer:
+            assert writer.tip['index'] == 9
+
+
+    def test_chain_file_stats(self, tmp_path):
+        """File stats must match chain_stats, from the summary or a legacy file."""
+        import json
+        import os
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import ChainWriter, chain_file_stats, chain_stats, load_chain, load_summary, summary_path
+        legacy = str(tmp_path / "legacy.json")
+        chain = synthetic_roadchain(300)
+        with open(legacy, 'w') as f:
+            json.dump(chain, f, indent=2)
+        assert load_summary(legacy) is None
+        assert chain_file_stats(legacy) == chain_stats(chain)
+        assert load_summary(legacy)['total_blocks'] == 300
+
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(40):
+                writer.append('alexa', 'alexa', f"entry {i}")
+            assert load_summary(path)['tip']['hash'] == writer.tip['hash']
+            assert chain_file_stats(path) == chain_stats(load_chain(path))
+        os.remove(summary_path(path))
+        with ChainWriter(path, fsync=False) as writer:
+            writer.append('alexa', 'alexa', 'reopened')
+        assert chain_file_stats(path)['total_blocks'] == 41
+
+        assert chain_file_stats(str(tmp_path / "missing.json")) == {}
+
+        # A hand-edited file no longer matches its summary
+        with open(path, 'w') as f:
+            json.dump(chain[:10], f)
+        assert load_summary(path) is None
+        assert chain_file_stats(path) == chain_stats(chain[:10])
+
+    def test_chain_file_stats_on_torn_file(self, tmp_path):
+        """A torn or half-written file must give the last good stats, never raise."""
+        import os
+        from roadchain import ChainWriter, chain_file_stats, chain_stats, load_chain, summary_path
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(20):
+                writer.append('alexa', 'alexa', f"entry {i}")
+        expected = chain_stats(load_chain(path))
+        with open(path, 'rb+') as f:
+            f.seek(-3, 2)
+            f.write(b',\n{"index": 20, "timest')
+        assert chain_file_stats(path) == expected  # from the summary
+        os.remove(summary_path(path))
+        assert chain_file_stats(path) == expected  # counted up to the tear
+        with open(path, 'w') as f:
+            f.write('not a chain')
+        assert chain_file_stats(path) == {}
+
+
+    def test_chain_watcher_verifies_only_appends(self, tmp_path):
+        """The watcher must check new blocks once, and alert on a bad one."""
+        import json
+        from roadchain import ChainWatcher, ChainWriter, make_block
+        path = str(tmp_path / "chain.json")
+        state = str(tmp_path / "watch.json")
+        alerts = []
+        watcher = ChainWatcher(path, on_alert=alerts.append, state_path=state)
+        assert watcher.poll() == []
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(10):
+                writer.append('alexa', 'alexa', f"entry {i}")
+            assert watcher.poll() == [] and watcher.verified == 10
+            assert watcher.poll() == [] and watcher.verified == 10
+            for i in range(5):
+                writer.append('alexa', 'alexa', f"more {i}")
+            tip = writer.tip
+        assert watcher.poll() == [] and watcher.verified == 15
+
+        # A restarted watcher resumes from its saved position
+        resumed = ChainWatcher(path, on_alert=alerts.append, state_path=state)
+        forged = make_block(15, tip['hash'], tip['timestamp'], 'mallory', 'alexa', 'forged')
+        forged['data'] = 'edited after hashing'
+        unlinked = make_block(16, '0' * 64, tip['timestamp'], 'mallory', 'alexa', 'unlinked')
+        tail = b',\n' + json.dumps(forged).encode() + b',\n' + json.dumps(unlinked).encode()
+        with open(path, 'rb+') as f:
+            f.seek(-3, 2)
+            f.write(tail[:-20])
+            f.flush()
+            # The second block is half-written: only the first is checked
+            assert [(a['index'], a['reason']) for a in resumed.poll()] == [(15, 'hash')]
+            f.write(tail[-20:] + b'\n]\n')
+        assert [(a['index'], a['reason']) for a in resumed.poll()] == [(16, 'link')]
+        assert resumed.verified == 17 and resumed.poll() == [] and len(alerts) == 2
+
+        with open(path, 'w') as f:
+            json.dump([tip], f)
+        assert [a['reason'] for a in resumed.poll()] == ['rewritten']
+        assert resumed.verified == 1
+
+    def test_chain_watcher_steps_over_malformed_block(self, tmp_path):
+        """A block that can never parse must alert once, not stall the watcher."""
+        import json
+        from roadchain import ChainWatcher, ChainWriter, load_chain
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(5):
+                writer.append('alexa', 'alexa', f"entry {i}")
+        first = load_chain(path)[0]
+        watcher = ChainWatcher(path)
+        assert watcher.poll() == [] and watcher.verified == 5
+        with open(path, 'rb+') as f:
+            f.seek(-3, 2)
+            bad = f.tell() + 2
+            f.write(b',\n{"index": 5, garbage}\n]\n')
+        assert [(a['reason'], a['offset']) for a in watcher.poll()] == [('malformed', bad)]
+        assert watcher.poll() == []
+        # Blocks appended after it are still checked, against the last good one
+        with open(path, 'rb+') as f:
+            f.seek(-3, 2)
+            f.write(b',\n' + json.dumps(first).encode() + b'\n]\n')
+        alerts = watcher.poll()
+        assert [a['reason'] for a in alerts] == ['link']
+        assert watcher.verified == 6 and watcher.poll() == []
+
+
+# ── roadchain_store.py tests ────────────────────────────────────────────────
+
+class TestRoadChainStore:
+    def test_binary_chain_random_access(self, tmp_path):
+        """Indexing, slicing, genesis and tip must match the source chain."""
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import BinaryChain, write_binary_chain
+        chain = synthetic_roadchain(40)
+        chain[0]['algorithm'] = 'sha256'
+        path = str(tmp_path / "chain.rchn")
+        assert write_binary_chain(iter(chain), path) == 40
+        with BinaryChain(path) as stored:
+            assert len(stored) == 40
+            assert stored[17] == chain[17]
+            assert stored[-1] == stored.tip == chain[-1]
+            assert stored.genesis == chain[0]
+            assert stored[5:9] == chain[5:9]
+            assert stored.raw_hashes(3)[1].hex() == chain[3]['hash']
+
+    def test_binary_json_round_trip(self, tmp_path):
+        """JSON → binary → JSON must preserve every block, including odd ones."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import load_chain
+        from roadchain_store import binary_to_json, json_to_binary
+        chain = synthetic_roadchain(10)
+        chain[4]['hash'] = 'NOT-A-HASH'
+        chain[6]['previous_hash'] = 'ABCDEF' * 10 + 'ABCD'
+        del chain[8]['index']
+        src, binary, dst = (str(tmp_path / n) for n in ("a.json", "a.rchn", "b.json"))
+        with open(src, 'w') as f:
+            json.dump(chain, f)
+        assert json_to_binary(src, binary) == 10
+        assert binary_to_json(binary, dst) == 10
+        assert load_chain(dst) == chain
+
+    def test_binary_chain_works_with_roadchain(self, tmp_path):
+        """Stats and sampled verification should use random access."""
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import chain_stats, verify_chain_integrity
+        from roadchain_store import BinaryChain, write_binary_chain
+        chain = synthetic_roadchain(25)
+        path = str(tmp_path / "chain.rchn")
+        write_binary_chain(chain, path)
+        with BinaryChain(path) as stored:
+            assert chain_stats(stored) == chain_stats(chain)
+            assert verify_chain_integrity(stored, sample_size=10)['checked'] == 10
+
+    def test_binary_chain_rejects_other_files(self, tmp_path):
+        """A file without the binary chain header must be refused."""
+        import pytest
+        from roadchain_store import BinaryChain
+        path = tmp_path / "not.rchn"
+        path.write_bytes(b"[" + b" " * 63)
+        with pytest.raises(ValueError):
+            BinaryChain(str(path))
+
+    def test_archive_reads_only_needed_segments(self, tmp_path):
+        """Point reads must decompress one segment; scans each segment once."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import ArchiveChain, write_archive
+        chain = synthetic_roadchain(1000)
+        raw = len(json.dumps(chain).encode())
+        for codec in ('zlib', 'lzma'):
+            path = str(tmp_path / f"chain.{codec}")
+            assert write_archive(iter(chain), path, segment_size=100, codec=codec) == 1000
+            assert raw / (tmp_path / f"chain.{codec}").stat().st_size > 3
+            with ArchiveChain(path, cached_segments=2) as archived:
+                assert archived.codec == codec and len(archived) == 1000
+                assert archived[517] == chain[517] and archived.segments_read == 1
+                assert archived[550:560] == chain[550:560] and archived.segments_read == 1
+                assert archived.tip == chain[-1] and archived.genesis == chain[0]
+                assert archived.segments_read == 3
+            with ArchiveChain(path) as archived:
+                assert list(archived) == chain and archived.segments_read == 10
+
+    def test_archive_round_trip_and_rejects_other_files(self, tmp_path):
+        """A JSON chain must archive losslessly; a foreign file is refused."""
+        import json
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import ArchiveChain, json_to_archive, write_archive
+        chain = synthetic_roadchain(7)
+        chain[3]['data'] = 'señor\nnewline'
+        src, archive = str(tmp_path / "a.json"), str(tmp_path / "a.rchz")
+        with open(src, 'w') as f:
+            json.dump(chain, f)
+        assert json_to_archive(src, archive, segment_size=3) == 7
+        with ArchiveChain(archive) as archived:
+            assert archived[:] == chain
+        write_archive([], archive)
+        with ArchiveChain(archive) as archived:
+            assert len(archived) == 0 and list(archived) == []
+        with pytest.raises(ValueError):
+            write_archive(chain, archive, codec='bz2')
+        with pytest.raises(ValueError):
+            ArchiveChain(src)
+
+    def test_sqlite_chain_works_like_a_loaded_chain(self, tmp_path):
+        """Stats, summary and full verification must accept the SQLite store."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain import chain_stats, summarize_chain, verify_chain_full
+        from roadchain_store import SqliteChain, json_to_sqlite
+        chain = synthetic_roadchain(60)
+        chain[7]['meta'] = {'tags': ['x']}
+        src, db = str(tmp_path / "chain.json"), str(tmp_path / "chain.db")
+        with open(src, 'w') as f:
+            json.dump(chain, f)
+        assert json_to_sqlite(src, db, batch_size=25) == 60
+        assert json_to_sqlite(src, db) == 60  # a re-import replaces
+        with SqliteChain(db) as stored:
+            assert len(stored) == 60 and stored[:] == chain and list(stored) == chain
+            assert stored[-2] == chain[-2] and stored[10:40:7] == chain[10:40:7]
+            assert chain_stats(stored) == chain_stats(chain)
+            assert summarize_chain(stored)['head'] == chain[:6]
+            assert verify_chain_full(stored, workers=1, shard_size=16)['valid']
+            assert stored.connection.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+    def test_sqlite_reimport_failure_keeps_old_chain(self, tmp_path):
+        """A re-import that fails partway must leave the previous store intact."""
+        import json
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import SqliteChain, json_to_sqlite
+        chain = synthetic_roadchain(50)
+        src, db = str(tmp_path / "chain.json"), str(tmp_path / "chain.db")
+        with open(src, 'w') as f:
+            json.dump(chain, f)
+        json_to_sqlite(src, db)
+        with open(src, 'r+') as f:
+            f.truncate(len(f.read()) - 300)
+        with pytest.raises(ValueError):
+            json_to_sqlite(src, db, batch_size=10)
+        with SqliteChain(db) as stored:
+            assert len(stored) == 50 and stored[:] == chain
+            indexes = stored.connection.execute(
+                "SELECT count(*) FROM sqlite_master WHERE type = 'index'").fetchone()[0]
+            assert indexes == 6
+
+    def test_sqlite_chain_queries_use_indexes(self, tmp_path):
+        """Column queries must match a scan and be answered from an index."""
+        import pytest
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import SqliteChain, write_sqlite_chain
+        chain = synthetic_roadchain(100)
+        db = str(tmp_path / "chain.db")
+        write_sqlite_chain(chain[:90], db)
+        assert write_sqlite_chain(chain[90:99], db, append=True) == 9
+        with SqliteChain(db) as stored:
+            stored.append(chain[99])
+            assert len(stored) == 100 and stored.tip == chain[-1]
+            assert stored.query(sender='alexa', since='2009-03', until='2009-05') == [
+                b for b in chain if b['sender'] == 'alexa' and '2009-03' <= b['timestamp'] < '2009-05']
+            assert stored.query(hash=chain[42]['hash']) == [chain[42]]
+            assert stored.query(index=5) == [chain[5]]
+            plan = stored.connection.execute(
+                'EXPLAIN QUERY PLAN SELECT body FROM blocks WHERE recipient = ?', ('time',)).fetchall()
+            assert 'blocks_recipient' in str(plan)
+            with pytest.raises(ValueError):
+                stored.query(data='journal entry 3')
+
+    def test_sidecar_index_queries(self, tmp_path):
+        """Indexed queries must return exactly the blocks a full scan would."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import SidecarIndex
+        chain = synthetic_roadchain(120)
+        chain[30]['sender'] = 'señor'  # non-ASCII shifts byte offsets
+        path = str(tmp_path / "chain.json")
+        with open(path, 'w') as f:
+            json.dump(chain, f, indent=1, ensure_ascii=False)
+        index = SidecarIndex.open(path)
+        assert index.count == 120
+        expected = [b for b in chain if b['sender'] == 'hal_finney' and b['timestamp'][:7] == '2009-02']
+        assert expected and index.query(sender='hal_finney', bucket='2009-02') == expected
+        assert index.query(sender='señor') == [chain[30]]
+        assert index.query(recipient='nobody') == []
+
+    def test_sidecar_index_catches_up_on_append(self, tmp_path):
+        """Reopening after the chain grows must index only the new blocks."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import SidecarIndex
+        chain = synthetic_roadchain(30)
+        path = str(tmp_path / "chain.json")
+        with open(path, 'w') as f:
+            json.dump(chain[:20], f)
+        assert SidecarIndex.open(path).count == 20
+        with open(path, 'w') as f:
+            json.dump(chain, f)
+        index = SidecarIndex.open(path)
+        assert index.count == 30
+        assert index.query(sender='time') == [b for b in chain if b['sender'] == 'time']
+        assert SidecarIndex.open(path).refresh() == 0
+
+        # A rewritten chain invalidates the saved tip and is re-indexed
+        with open(path, 'w') as f:
+            json.dump(synthetic_roadchain(5), f)
+        assert SidecarIndex.open(path).count == 5
+
+    def test_sidecar_index_appends_to_its_log(self, tmp_path):
+        """Saving after appends must only extend the log until it outgrows the snapshot."""
+        from roadchain import ChainWriter, load_chain
+        from roadchain_store import SidecarIndex
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(10):
+                writer.append('satoshi', 'hal_finney', f"entry {i}")
+        index = SidecarIndex.open(path)
+        index.LOG_MIN_ENTRIES = 15
+        snapshot = (tmp_path / "chain.json.idx.json").read_bytes()
+        with ChainWriter(path, fsync=False, on_commit=index.add_entries) as writer:
+            for i in range(12):
+                writer.append('alexa', 'time', f"more {i}")
+                index.save()
+        assert (tmp_path / "chain.json.idx.json").read_bytes() == snapshot
+        assert len((tmp_path / "chain.json.idx.log").read_text().splitlines()) == 13
+        reopened = SidecarIndex.open(path)
+        assert reopened.count == 22 and reopened.refresh() == 0
+        assert reopened.query(sender='alexa') == load_chain(path)[10:]
+
+        with ChainWriter(path, fsync=False, on_commit=index.add_entries) as writer:
+            for i in range(5):
+                writer.append('alexa', 'time', f"last {i}")
+        index.save()  # 17 log entries > max(10, 15): merged into a new snapshot
+        assert (tmp_path / "chain.json.idx.json").read_bytes() != snapshot
+        assert len((tmp_path / "chain.json.idx.log").read_text().splitlines()) == 1
+        assert SidecarIndex.open(path).query(recipient='time') == load_chain(path)[10:]
+
+    def test_sidecar_index_survives_bad_logs(self, tmp_path):
+        """A torn log line or a log from an older snapshot must not corrupt the index."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import SidecarIndex
+        chain = synthetic_roadchain(40)
+        path = str(tmp_path / "chain.json")
+        with open(path, 'w') as f:
+            json.dump(chain[:30], f)
+        SidecarIndex.open(path)
+        log = tmp_path / "chain.json.idx.log"
+        stale = log.read_text()
+        with open(path, 'w') as f:
+            json.dump(chain, f)
+        index = SidecarIndex.open(path)
+        index.save()
+        log.write_text(log.read_text() + '[123, 4')
+        assert SidecarIndex.open(path).query(sender='time') == [b for b in chain if b['sender'] == 'time']
+        log.write_text(stale.replace('"generation": ', '"generation": 9'))
+        assert SidecarIndex.open(path).count == 40
+
+    def test_text_index_and_or_queries(self, tmp_path):
+        """Keyword queries must match a scan of every block's data."""
+        import json
+        from chain_benchmark import synthetic_roadchain
+        from roadchain_store import TextIndex, decode_postings
+        chain = synthetic_roadchain(400)
+        chain[3]['data'] = 'Bitcoin genesis, señor Satoshi'
+        chain[399]['data'] = 'genesis again'
+        path = str(tmp_path / "chain.json")
+        with open(path, 'w') as f:
+            json.dump(chain, f, indent=1, ensure_ascii=False)
+        TextIndex.open(path)
+        index = TextIndex.open(path)  # loaded from disk this time
+        assert index.count == 400
+
+        def scan(*words):
+            return [i for i, b in enumerate(chain) if set(words) <= set(b['data'].lower().replace(',', '').split())]
+
+        assert index.search('genesis') == scan('genesis') == [3, 399]
+        assert index.search('GENESIS bitcoin') == index.search('genesis AND bitcoin') == [3]
+        assert index.search('señor OR again OR 17') == sorted(set(scan('señor') + scan('again') + scan('17')))
+        assert index.search('entry 1') == scan('entry', '1')
+        assert index.search('nothing') == index.search('') == []
+        assert index.blocks(index.search('satoshi')) == [chain[3]]
+        assert decode_postings(index.postings['journal']) == scan('journal')
+        assert len(index.postings['journal']) == 398  # one byte per gap
+
+    def test_text_index_follows_appends(self, tmp_path):
+        """The index must take appends from ChainWriter and rebuild after a rewrite."""
+        import json
+        from roadchain import ChainWriter
+        from roadchain_store import TextIndex
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            writer.append('alexa', 'alexa', 'first light')
+        index = TextIndex.open(path)
+        with ChainWriter(path, fsync=False, on_commit=index.add_entries) as writer:
+            futures = [writer.submit('alexa', 'alexa', f"entry {i} light" if i % 100 == 0 else f"entry {i}")
+                       for i in range(300)]
+            futures[-1].result()
+        assert index.search('light') == [0, 1, 101, 201]
+        index.save()
+        with ChainWriter(path, fsync=False) as writer:
+            writer.append('alexa', 'alexa', 'last light')
+        assert TextIndex.open(path).search('light') == [0, 1, 101, 201, 301]
+
+        with open(path, 'w') as f:
+            json.dump([{'index': 0, 'hash': 'x', 'data': 'dark'}], f)
+        reopened = TextIndex.open(path)
+        assert reopened.count == 1 and reopened.search('light') == []
+
+    def test_text_index_appends_to_its_log(self, tmp_path):
+        """Saving after appends must only extend the log until it outgrows the snapshot."""
+        from roadchain import ChainWriter
+        from roadchain_store import TextIndex
+        path = str(tmp_path / "chain.json")
+        with ChainWriter(path, fsync=False) as writer:
+            for i in range(10):
+                writer.append('alexa', 'alexa', f"entry {i}")
+        index = TextIndex.open(path)
+        index.LOG_MIN_ENTRIES = 15
+        snapshot = (tmp_path / "chain.json.fts").read_bytes()
+        with ChainWriter(path, fsync=False, on_commit=index.add_entries) as writer:
+            for i in range(12):
+                writer.append('alexa', 'alexa', f"señor {i}")
+                index.save()
+        assert (tmp_path / "chain.json.fts").read_bytes() == snapshot
+        log = tmp_path / "chain.json.fts.log"
+        assert len(log.read_text().splitlines()) == 13
+        reopened = TextIndex.open(path)
+        assert reopened.count == 22 and reopened.refresh() == 0
+        assert reopened.search('señor') == list(range(10, 22))
+        assert reopened.search('entry 3 OR señor 3') == [3, 13]
+
+        with ChainWriter(path, fsync=False, on_commit=index.add_entries) as writer:
+            for i in range(5):
+                writer.append('alexa', 'alexa', f"last {i}")
+        index.save()  # 17 log entries > max(10, 15): merged into a new snapshot
+        assert (tmp_path / "chain.json.fts").read_bytes() != snapshot
+        assert len(log.read_text().splitlines()) == 1
+        assert TextIndex.open(path).search('last') == list(range(22, 27))
+
+        # A torn line or a log from an older snapshot is not replayed
+        log.write_text(log.read_text(encoding='utf-8') + '[123, 4', encoding='utf-8')
+        assert TextIndex.open(path).search('last') == list(range(22, 27))
+        log.write_text('{"generation": 0}\n[0, 10, "x", ["last"]]\n')
+        assert TextIndex.open(path).search('last') == list(range(22, 27))
+
+
+# ── chain_benchmark.py tests ────────────────────────────────────────────────
+
+class TestChainBenchmark:
+    def test_run_benchmarks_records_every_operation(self):
+        """Each size should report throughput and peak memory per operation."""
+        from chain_benchmark import run_benchmarks
+        current = run_benchmarks([200])
+        row = current['results']['200']
+        assert set(row) == {'build_chain', 'verify_chain', 'ps_append',
+                            'ps_verify', 'load_chain', 'chain_stats', 'file_stats'}
+        assert all(r['blocks_per_s'] > 0 for r in row.values())
+        assert row['build_chain']['peak_bytes'] > 0
+
+    def test_find_regressions(self):
+        """Only slowdowns or memory growth beyond the threshold are flagged."""
+        from chain_benchmark import find_regressions
+        baseline = {'results': {'1000': {'build_chain': {'blocks_per_s': 1000.0, 'peak_bytes': 100}}}}
+        ok = {'results': {'1000': {'build_chain': {'blocks_per_s': 900.0, 'peak_bytes': 110}}}}
+        slow = {'results': {'1000': {'build_chain': {'blocks_per_s': 500.0, 'peak_bytes': 200}}}}
+        assert find_regressions(ok, baseline, 0.25) == []
+        flagged = find_regressions(slow, baseline, 0.25)
+        assert {r['metric'] for r in flagged} == {'blocks_per_s', 'peak_bytes'}
+
+    def test_baseline_round_trip(self, tmp_path):
+        """A saved baseline should load back unchanged."""
+        from chain_benchmark import load_baseline, save_baseline
+        path = str(tmp_path / "baseline.json")
+        assert load_baseline(path) == {}
+        save_baseline({'results': {}}, path)
+        assert load_baseline(path) == {'results': {}}
+
+
 # ── riemann_zeros.py tests ──────────────────────────────────────────────────
 
 class TestRiemannZeros: